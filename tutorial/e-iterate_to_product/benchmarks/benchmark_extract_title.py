@@ -0,0 +1,57 @@
+"""Benchmark of the title extraction.
+
+The names are sampled from the validation data, so they repeat heavily, and
+made distinct with a suffix for the benchmark of the title cache, which
+compares the first run, parsing all the names, with a repeat run finding them
+all in the cache. Run from the project folder with
+
+    python benchmarks/benchmark_extract_title.py
+"""
+import os
+import time
+import logging
+import numpy as np
+import pandas as pd
+from titanic import data
+
+validation_data = os.path.join(os.path.dirname(__file__), "../tests/validation_data/titanic.csv")
+
+logging.disable(logging.INFO)
+
+
+def benchmark_extract_title(n_rows):
+    """Return the rows per second of `extract_title` on `n_rows` names."""
+    names = pd.read_csv(validation_data, usecols=['Name'])
+    df = names.sample(n=n_rows, replace=True, random_state=0).reset_index(drop=True)
+
+    start = time.perf_counter()
+    data.extract_title(df)
+    elapsed = time.perf_counter() - start
+
+    return n_rows / elapsed
+
+
+def benchmark_title_cache(n_rows):
+    """Return the rows per second of a first and of a repeat run with a title cache."""
+    names = pd.read_csv(validation_data, usecols=['Name'])
+    df = names.sample(n=n_rows, replace=True, random_state=0).reset_index(drop=True)
+    surname_title = df['Name'].str.split(',', n=1)
+    df['Name'] = surname_title.str[0] + '-' + pd.Series(np.arange(n_rows)).astype(str) + ',' + surname_title.str[1]
+
+    cache = data.TitleCache(max_size=n_rows)
+    throughputs = []
+    for _ in range(2):
+        start = time.perf_counter()
+        data.extract_title(df, title_cache=cache)
+        throughputs.append(n_rows / (time.perf_counter() - start))
+
+    return throughputs
+
+
+if __name__ == '__main__':
+    for n_rows in [10 ** 4, 10 ** 6, 10 ** 7]:
+        print('{:>10,d} rows: {:>14,.0f} rows/sec'.format(n_rows, benchmark_extract_title(n_rows)))
+    for n_rows in [10 ** 4, 10 ** 6]:
+        first, repeat = benchmark_title_cache(n_rows)
+        print('{:>10,d} distinct names: {:>14,.0f} rows/sec first run, {:>14,.0f} rows/sec repeat run'.format(
+            n_rows, first, repeat))
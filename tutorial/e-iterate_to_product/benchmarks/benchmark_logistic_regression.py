@@ -0,0 +1,41 @@
+"""Benchmark of the search methods of the ridge parameter.
+
+The training set is resampled with replacement to a multiple of its size,
+after the split, so that no passenger of the test set is seen in training.
+Run from the project folder with
+
+    python benchmarks/benchmark_logistic_regression.py
+"""
+import os
+import time
+import logging
+import warnings
+import numpy as np
+from titanic import models, pipelines
+
+validation_data = os.path.join(os.path.dirname(__file__), "../tests/validation_data/titanic.csv")
+
+logging.disable(logging.INFO)
+warnings.filterwarnings('ignore')
+
+
+def benchmark_search(search, n_repeats=10):
+    """Return the test accuracy and the wall-clock seconds of a search method."""
+    processed_data = pipelines.read_titanic_data(validation_data)
+    X_train, X_test, y_train, y_test = models.data_preparation(processed_data,
+                                                               test_size=0.2,
+                                                               random_state=0)
+    resample = np.random.RandomState(0).randint(len(y_train), size=n_repeats * len(y_train))
+    X_train, y_train = X_train[resample], y_train[resample]
+
+    start = time.perf_counter()
+    model = models.run_logistic_regression(X_train, X_test, y_train, y_test, search=search)
+    elapsed = time.perf_counter() - start
+
+    return model.score(X_test, y_test), elapsed
+
+
+if __name__ == '__main__':
+    for search in models.SEARCH_METHODS:
+        accuracy, elapsed = benchmark_search(search)
+        print('{:>8}: accuracy {:.1f}%, {:.2f} s'.format(search, accuracy * 100, elapsed))
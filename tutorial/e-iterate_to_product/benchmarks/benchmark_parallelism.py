@@ -0,0 +1,71 @@
+"""Benchmark of the parallelism settings of the grid search.
+
+Times the grid search of the logistic regression for every combination of
+joblib backend, number of workers and BLAS threads per worker that fits in
+the available processors, and prints the fastest. Run from the project
+folder with
+
+    python benchmarks/benchmark_parallelism.py
+    python benchmarks/benchmark_parallelism.py --backends loky threading --repeats 50
+
+The best setting can then be exported, for example
+
+    export TITANIC_N_JOBS=16 TITANIC_BLAS_THREADS=4
+"""
+import os
+import time
+import logging
+import argparse
+import warnings
+from titanic import models, parallel, pipelines
+from titanic.config import JOBLIB_BACKENDS
+
+validation_data = os.path.join(os.path.dirname(__file__), "../tests/validation_data/titanic.csv")
+
+
+def powers_of_two(maximum):
+    values = [1]
+    while values[-1] * 2 <= maximum:
+        values.append(values[-1] * 2)
+    if values[-1] != maximum:
+        values.append(maximum)
+    return values
+
+
+def benchmark_settings(split, backend, n_jobs, blas_threads, search):
+    """Wall-clock seconds of the search with the given settings."""
+    parallel.configure(backend=backend, blas_threads=blas_threads)
+    start = time.perf_counter()
+    models.run_logistic_regression(*split, search=search, n_jobs=n_jobs)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backends', nargs='+', choices=JOBLIB_BACKENDS, default=list(JOBLIB_BACKENDS))
+    parser.add_argument('--repeats', type=int, default=10, help='Copies of the validation data')
+    parser.add_argument('--search', default='grid', help='Search method of the logistic regression')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    warnings.filterwarnings('ignore')
+
+    processed_data = pipelines.read_titanic_data(validation_data)
+    processed_data = processed_data.sample(frac=args.repeats, replace=True, random_state=0)
+    split = models.data_preparation(processed_data, test_size=0.2, random_state=0)
+
+    cpus = parallel.available_cpus()
+    print('{} available processors, {} training rows'.format(cpus, split[0].shape[0]))
+
+    results = []
+    for backend in args.backends:
+        for n_jobs in powers_of_two(cpus):
+            for blas_threads in powers_of_two(cpus // n_jobs):
+                seconds = benchmark_settings(split, backend, n_jobs, blas_threads, args.search)
+                results.append((seconds, backend, n_jobs, blas_threads))
+                print('{:>16} {:>4} jobs {:>4} BLAS threads: {:.2f} s'.format(
+                    backend, n_jobs, blas_threads, seconds))
+
+    seconds, backend, n_jobs, blas_threads = min(results)
+    print('Best: --backend {} --n-jobs {} --blas-threads {} ({:.2f} s)'.format(
+        backend, n_jobs, blas_threads, seconds))
@@ -0,0 +1,44 @@
+"""Benchmark of the scaling of the repeated evaluation with the processes.
+
+Times the repeated evaluation of the logistic regression on synthetic
+passengers with 1, 2, 4, ... processes up to the available processors, and
+prints the speed-up and the parallel efficiency. Run from the project folder
+with
+
+    python benchmarks/benchmark_resampling.py --rows 100000 --repeats 64
+"""
+import time
+import logging
+import argparse
+import warnings
+from sklearn.linear_model import LogisticRegression
+from titanic import models, parallel, pipelines, resampling
+from benchmark_suite import synthetic_passengers
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10 ** 5)
+    parser.add_argument('--repeats', type=int, default=32)
+    parser.add_argument('--method', default='split', help='Resampling method')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    warnings.filterwarnings('ignore')
+
+    raw_data = synthetic_passengers(args.rows)
+    processed_data = pipelines.process_data(raw_data[pipelines.COLUMNS], raw_data['Age'].median())
+    X, _ = models.design_matrix(processed_data, vocabulary=models.category_vocabulary(processed_data))
+    y = processed_data['Survived'].values
+    estimators = {'logistic_regression': LogisticRegression(solver='lbfgs', random_state=0)}
+
+    processes, reference = 1, None
+    while processes <= parallel.available_cpus():
+        start = time.perf_counter()
+        resampling.repeated_evaluation(X, y, estimators, n_repeats=args.repeats,
+                                       method=args.method, processes=processes)
+        seconds = time.perf_counter() - start
+        reference = reference or seconds
+        print('{:>4} processes: {:.2f} s, speed-up {:.2f}, efficiency {:.0f}%'.format(
+            processes, seconds, reference / seconds, reference / seconds / processes * 100))
+        processes *= 2
@@ -0,0 +1,53 @@
+"""Benchmark of the exported scorer against the scikit-learn search.
+
+Compares the rows per second of `predict` of the fitted `GridSearchCV` on the
+design matrix with those of the scorer of `models.export_scorer`, on the same
+design matrix and on the raw passenger records, for batches of increasing
+size. Run from the project folder with
+
+    python benchmarks/benchmark_scorer.py
+"""
+import os
+import time
+import logging
+import warnings
+import numpy as np
+from titanic import models, pipelines, scoring
+
+validation_data = os.path.join(os.path.dirname(__file__), "../tests/validation_data/titanic.csv")
+
+logging.disable(logging.INFO)
+warnings.filterwarnings('ignore')
+
+
+def rows_per_second(function, n_rows, min_seconds=0.5):
+    """Rows per second of `function` called repeatedly for at least `min_seconds`."""
+    n_calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_seconds:
+        function()
+        n_calls += 1
+    return n_calls * n_rows / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    raw_data = pipelines.read_raw_data(validation_data)
+    processed_data = pipelines.read_titanic_data(validation_data)
+    vocabulary = models.category_vocabulary(processed_data)
+    split = models.data_preparation(processed_data, test_size=0.2, random_state=0, vocabulary=vocabulary)
+    gs = models.run_logistic_regression(*split, search='grid')
+    scorer = models.export_scorer(gs, vocabulary, {'Age': processed_data['Age'].median()})
+
+    for batch_size in [1, 10, 100, 10 ** 4]:
+        rows = np.arange(batch_size) % len(raw_data)
+        X, _ = models.design_matrix(processed_data.iloc[rows], vocabulary=vocabulary)
+        records = raw_data.iloc[rows].to_dict('records')
+
+        assert np.array_equal(scoring.predict(X, scorer), gs.predict(X))
+
+        print('{:>7,d} rows: gs.predict {:>12,.0f} rows/sec, scorer {:>12,.0f} rows/sec, '
+              'scorer with encoding {:>12,.0f} rows/sec'.format(
+                  batch_size,
+                  rows_per_second(lambda: gs.predict(X), batch_size),
+                  rows_per_second(lambda: scoring.predict(X, scorer), batch_size),
+                  rows_per_second(lambda: scoring.score_records(records, scorer), batch_size)))
@@ -0,0 +1,154 @@
+"""Benchmark suite of the stages of the titanic package.
+
+Generates synthetic passengers from the validation data, times every stage
+at every size, and measures the peak memory allocated by the stage. The
+results are stored as JSON, and compared with a baseline to fail when a stage
+regresses. Run from the project folder with
+
+    python benchmarks/benchmark_suite.py --sizes 1000 100000 --output results.json
+    python benchmarks/benchmark_suite.py --sizes 1000 100000 --baseline results.json
+
+The logistic regression runs a full cross-validated search, so large sizes
+are best benchmarked with the stages `--stages extract_title data_preparation`.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tempfile
+import warnings
+import tracemalloc
+import numpy as np
+import pandas as pd
+from titanic import data, models, pipelines
+
+validation_data = os.path.join(os.path.dirname(__file__), "../tests/validation_data/titanic.csv")
+
+STAGES = ['extract_title', 'data_preparation', 'run_majority_vote',
+          'run_logistic_regression', 'run_titanic_analysis']
+
+
+def synthetic_passengers(n_rows, random_state=0):
+    """Synthetic raw passengers with the schema of the validation data.
+
+    The rows are sampled from the validation data, which keeps the relations
+    between the columns, and the surnames get a random suffix, so that most
+    of the names are distinct, as in large manifests.
+    """
+
+    rng = np.random.RandomState(random_state)
+    passengers = pd.read_csv(validation_data)
+    df = passengers.iloc[rng.randint(len(passengers), size=n_rows)].reset_index(drop=True)
+
+    surname_title = df['Name'].str.split(',', n=1)
+    suffix = pd.Series(rng.randint(n_rows, size=n_rows)).astype(str)
+    df['Name'] = surname_title.str[0] + '-' + suffix + ',' + surname_title.str[1]
+    df['PassengerId'] = np.arange(1, n_rows + 1)
+
+    return df
+
+
+def stage_runners(n_rows, folder, search):
+    """Functions running each stage on prepared inputs of `n_rows` rows."""
+
+    raw_data = synthetic_passengers(n_rows)
+    filename = os.path.join(folder, 'titanic_{}.csv'.format(n_rows))
+    raw_data.to_csv(filename, index=False)
+
+    processed_data = pipelines.process_data(raw_data[pipelines.COLUMNS], raw_data['Age'].median())
+    split = models.data_preparation(processed_data, test_size=0.2, random_state=0)
+
+    return {
+        'extract_title': lambda: data.extract_title(raw_data),
+        'data_preparation': lambda: models.data_preparation(processed_data, test_size=0.2, random_state=0),
+        'run_majority_vote': lambda: models.run_majority_vote(*split),
+        'run_logistic_regression': lambda: models.run_logistic_regression(*split, search=search),
+        'run_titanic_analysis': lambda: pipelines.run_titanic_analysis(filename, search=search),
+    }
+
+
+def measure(runner):
+    """Seconds and peak allocated megabytes of a stage.
+
+    The stage runs twice, as tracing the allocations slows it down.
+    """
+
+    start = time.perf_counter()
+    runner()
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    runner()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return seconds, peak / 2 ** 20
+
+
+def run_suite(sizes, stages, search):
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        for n_rows in sizes:
+            runners = stage_runners(n_rows, folder, search)
+            for stage in stages:
+                seconds, peak_memory = measure(runners[stage])
+                results.append({'stage': stage,
+                                'rows': n_rows,
+                                'seconds': seconds,
+                                'rows_per_second': n_rows / seconds,
+                                'peak_memory_mb': peak_memory})
+                print('{:>24} {:>10,d} rows: {:>14,.0f} rows/sec {:>10.1f} MB'.format(
+                    stage, n_rows, n_rows / seconds, peak_memory))
+    return results
+
+
+def regressions(results, baseline, threshold):
+    """Descriptions of the stages slower or bigger than the baseline."""
+
+    baseline = {(result['stage'], result['rows']): result for result in baseline}
+    found = []
+    for result in results:
+        reference = baseline.get((result['stage'], result['rows']))
+        if reference is None:
+            continue
+        if result['rows_per_second'] < reference['rows_per_second'] * (1 - threshold):
+            found.append('{stage} at {rows} rows: {rows_per_second:,.0f} rows/sec'.format(**result)
+                         + ' against {:,.0f}'.format(reference['rows_per_second']))
+        if result['peak_memory_mb'] > reference['peak_memory_mb'] * (1 + threshold):
+            found.append('{stage} at {rows} rows: {peak_memory_mb:.1f} MB'.format(**result)
+                         + ' against {:.1f}'.format(reference['peak_memory_mb']))
+    return found
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10 ** 3, 10 ** 4, 10 ** 5])
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    parser.add_argument('--search', default='grid', help='Search method of the logistic regression')
+    parser.add_argument('--output', help='JSON file to store the results in')
+    parser.add_argument('--baseline', help='JSON file of the results to compare with')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Tolerated relative loss of throughput or increase of memory')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    warnings.filterwarnings('ignore')
+
+    results = run_suite(args.sizes, args.stages, args.search)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'python': sys.version,
+                       'platform': platform.platform(),
+                       'cpu_count': os.cpu_count(),
+                       'results': results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f)['results'], args.threshold)
+        for regression in found:
+            print('Regression: {}'.format(regression))
+        sys.exit(1 if found else 0)
@@ -0,0 +1,100 @@
+"""Load test of the prediction server.
+
+Trains a model artifact on the validation data, starts the server in a
+separate process and reports the latency percentiles of the requests sent by
+concurrent keep-alive connections. Run from the project folder with
+
+    python benchmarks/load_test_server.py --connections 8 --requests 2000
+"""
+import os
+import json
+import time
+import socket
+import asyncio
+import logging
+import argparse
+import tempfile
+import warnings
+import multiprocessing
+import numpy as np
+from titanic import pipelines, server
+
+validation_data = os.path.join(os.path.dirname(__file__), "../tests/validation_data/titanic.csv")
+
+RECORDS = [
+    {'Name': 'Braund, Mr. Owen Harris', 'Sex': 'male', 'Age': 22},
+    {'Name': 'Cumings, Mrs. John Bradley (Florence Briggs Thayer)', 'Sex': 'female', 'Age': 38},
+    {'Name': 'Palsson, Master. Gosta Leonard', 'Sex': 'male', 'Age': None},
+]
+
+
+async def connection(port, n_requests, latencies):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for i in range(n_requests):
+        body = json.dumps(RECORDS[i % len(RECORDS)]).encode()
+        start = time.perf_counter()
+        writer.write('POST /predict HTTP/1.1\r\nContent-Length: {}\r\n\r\n'.format(len(body)).encode() + body)
+        await reader.readline()
+        content_length = 0
+        while True:
+            line = await reader.readline()
+            if line == b'\r\n':
+                break
+            if line.lower().startswith(b'content-length'):
+                content_length = int(line.split(b':')[1])
+        await reader.readexactly(content_length)
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+
+
+async def load_test(port, n_connections, n_requests):
+    latencies = []
+    await asyncio.gather(*[connection(port, n_requests // n_connections, latencies)
+                           for _ in range(n_connections)])
+    return np.array(latencies)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(port, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port)).close()
+            return
+        except ConnectionRefusedError:
+            time.sleep(0.05)
+    raise RuntimeError('The server did not start')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--connections', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    warnings.filterwarnings('ignore')
+
+    with tempfile.TemporaryDirectory() as folder:
+        artifact_file = os.path.join(folder, 'model.json')
+        pipelines.run_titanic_training(validation_data, artifact_file, search='path')
+
+        port = free_port()
+        process = multiprocessing.Process(target=server.run_server, args=(artifact_file, '127.0.0.1', port))
+        process.start()
+        try:
+            wait_for(port)
+            asyncio.run(load_test(port, args.connections, 100))  # Warm-up
+            latencies = asyncio.run(load_test(port, args.connections, args.requests)) * 1000
+        finally:
+            process.terminate()
+            process.join()
+
+    print('{} requests over {} connections'.format(len(latencies), args.connections))
+    for percentile in [50, 90, 99]:
+        print('p{}: {:.3f} ms'.format(percentile, np.percentile(latencies, percentile)))
@@ -25,21 +25,38 @@ setup(
     author_email='filippo@satalia.com',  # Substitute your email
     license='MIT',
     packages=['titanic'],
+    # Python 3.8 for the shared memory of the repeated evaluation
+    python_requires='>=3.8',
     install_requires=[
         'pypandoc>=1.4',
         'watermark>=1.8.1',
-        'pandas>=0.24.2',
-        'scikit-learn>=0.20.3',
-        'scipy>=1.2.1',
+        'numpy>=1.17.3',
+        # 1.3 for the Arrow strings of the names
+        'pandas>=1.3',
+        # 1.1 for the log-loss of SGDClassifier, with HalvingGridSearchCV since 0.24
+        'scikit-learn>=1.1',
+        'scipy>=1.3.2',
+        # 1.3 for joblib.parallel_config
+        'joblib>=1.3',
+        'threadpoolctl>=3.0',
         'matplotlib>=3.0.3',
         'pytest>=4.3.1',
         'pytest-runner>=4.4',
         'click>=7.0'
     ],
+    extras_require={
+        # Parquet and Feather input files
+        'columnar': ['pyarrow>=8.0'],
+    },
     setup_requires=['pytest-runner'],
     tests_require=['pytest'],
     entry_points='''
         [console_scripts]
         titanic_analysis=titanic.command_line:titanic_analysis
+        titanic_train=titanic.command_line:titanic_train
+        titanic_score=titanic.command_line:titanic_score
+        titanic_serve=titanic.command_line:titanic_serve
+        titanic_update=titanic.command_line:titanic_update
+        titanic_evaluate=titanic.command_line:titanic_evaluate
     '''
 )
@@ -0,0 +1,49 @@
+import os
+import sys
+import subprocess
+
+project_folder = os.path.join(os.path.dirname(__file__), '..')
+
+# Cumulative import time budget of the command line module, in microseconds
+IMPORT_TIME_BUDGET = 300000
+
+
+def imported_modules(code):
+    """Cumulative import time of the modules imported by `code`, from `python -X importtime`."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=project_folder, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            universal_newlines=True, check=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and not line.endswith('package'):
+            _, cumulative, module = line[len('import time:'):].split('|')
+            modules[module.strip()] = int(cumulative)
+    return modules
+
+
+def test_help_import_time():
+    modules = imported_modules(
+        "from titanic.command_line import titanic_analysis\n"
+        "try:\n"
+        "    titanic_analysis(['--help'])\n"
+        "except SystemExit:\n"
+        "    pass\n"
+    )
+
+    assert 'pandas' not in modules
+    assert 'sklearn' not in modules
+    assert modules['titanic.command_line'] < IMPORT_TIME_BUDGET
+
+
+def test_pipelines_import_time():
+    modules = imported_modules("import titanic.pipelines")
+
+    assert 'sklearn' not in modules
+
+
+def test_scoring_import_time():
+    modules = imported_modules("import titanic.scoring, titanic.server")
+
+    assert 'numpy' in modules
+    assert 'pandas' not in modules
+    assert 'sklearn' not in modules
@@ -1,5 +1,6 @@
 from titanic import data
 import pandas as pd
+import pytest
 from pandas.util.testing import assert_frame_equal
 
 
@@ -69,3 +70,43 @@ def test_extract_title():
     expected['Title'] = expected['Title'].astype('category')
 
     assert_frame_equal(result, expected)
+
+
+def test_extract_title_unknown_title():
+
+    df = pd.DataFrame({'Name': ['Braund, Mr. Owen Harris',
+                                'Smith, Prof. John',
+                                'Nameless']})
+
+    with pytest.raises(KeyError):
+        data.extract_title(df)
+
+    result = data.extract_title(df, unknown_title='other')
+    assert list(result['Title']) == ['Mr', 'Other', 'Other']
+    assert list(result['Title'].cat.categories) == ['Mr', 'Other']
+
+    result = data.extract_title(df, unknown_title='quarantine')
+    known, quarantined = data.quarantine_unknown_titles(result)
+    assert list(known['Title']) == ['Mr']
+    assert list(quarantined['Name']) == ['Smith, Prof. John', 'Nameless']
+
+
+def test_persistent_title_cache(tmpdir):
+    cache_file = str(tmpdir.join('titles.pkl'))
+    df = pd.DataFrame({'Name': ['Braund, Mr. Owen Harris',
+                                'Heikkinen, Miss. Laina',
+                                'Braund, Mr. Owen Harris',
+                                'Nameless']})
+
+    with data.persistent_title_cache(cache_file, max_size=10) as cache:
+        result = data.extract_title(df, unknown_title='other')
+    assert cache.titles == {'Braund, Mr. Owen Harris': 'Mr',
+                            'Heikkinen, Miss. Laina': 'Miss',
+                            'Nameless': None}
+
+    with data.persistent_title_cache(cache_file, max_size=2) as cache:
+        assert_frame_equal(data.extract_title(df, unknown_title='other'), result)
+        assert len(cache) == 2
+        data.extract_title(pd.DataFrame({'Name': ['Heikkinen, Miss. Laina']}))
+    # The least recently used names are evicted
+    assert list(data.TitleCache.load(cache_file).titles) == ['Braund, Mr. Owen Harris', 'Heikkinen, Miss. Laina']
@@ -0,0 +1,45 @@
+from titanic import evaluation, models, pipelines
+import os
+import numpy as np
+import pytest
+from sklearn.metrics import accuracy_score, confusion_matrix, log_loss, roc_auc_score
+
+validation_data = os.path.join(os.path.dirname(__file__), "validation_data/titanic.csv")
+
+
+def test_evaluation():
+    rng = np.random.RandomState(0)
+    y_true = rng.randint(2, size=10000)
+    y_score = np.clip(0.3 * y_true + 0.7 * rng.uniform(size=len(y_true)), 0, 1)
+
+    report = evaluation.Evaluation().update(y_true, y_score).report()
+
+    y_pred = (y_score > 0.5).astype(int)
+    assert report['n_samples'] == len(y_true)
+    assert report['accuracy'] == accuracy_score(y_true, y_pred)
+    assert report['confusion_matrix'] == confusion_matrix(y_true, y_pred).tolist()
+    assert report['log_loss'] == pytest.approx(log_loss(y_true, y_score))
+    assert report['roc_auc'] == pytest.approx(roc_auc_score(y_true, y_score), abs=1e-4)
+    assert sum(calibration['count'] for calibration in report['calibration']) == len(y_true)
+
+    chunked = evaluation.Evaluation()
+    for start in range(0, len(y_true), 3000):
+        chunked.update(y_true[start:start + 3000], y_score[start:start + 3000])
+    assert chunked.report()['confusion_matrix'] == report['confusion_matrix']
+    assert chunked.report()['log_loss'] == pytest.approx(report['log_loss'])
+    assert chunked.report()['roc_auc'] == report['roc_auc']
+
+
+def test_evaluate():
+    processed_data = pipelines.read_titanic_data(validation_data)
+    X_train, X_test, y_train, y_test = models.data_preparation(processed_data, test_size=0.2, random_state=0)
+    model = models.run_logistic_regression(X_train, X_test, y_train, y_test, search='path')
+
+    report, predictions = evaluation.evaluate(model, X_test, y_test)
+    chunked_report, chunked_predictions = evaluation.evaluate(model, X_test, y_test, chunksize=50)
+
+    assert np.array_equal(predictions, model.predict(X_test))
+    assert np.array_equal(chunked_predictions, predictions)
+    assert chunked_report['confusion_matrix'] == report['confusion_matrix']
+    assert chunked_report['log_loss'] == pytest.approx(report['log_loss'])
+    assert chunked_report['roc_auc'] == report['roc_auc']
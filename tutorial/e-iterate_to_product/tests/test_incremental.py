@@ -0,0 +1,48 @@
+from titanic import incremental, models, pipelines
+import os
+import numpy as np
+
+validation_data = os.path.join(os.path.dirname(__file__), "validation_data/titanic.csv")
+
+
+def test_incremental_model(tmpdir):
+    raw_data = pipelines.read_raw_data(validation_data)
+    state_file = str(tmpdir.join('state.pkl'))
+
+    first_batch = str(tmpdir.join('first.csv'))
+    raw_data.iloc[:600].to_csv(first_batch, index=False)
+    incremental.run_incremental_update(first_batch, state_file)
+
+    second_batch = str(tmpdir.join('second.csv'))
+    raw_data.iloc[600:].to_csv(second_batch, index=False)
+    drift = incremental.run_incremental_update(second_batch, state_file, full_data=validation_data,
+                                               chunksize=100)
+
+    model = incremental.IncrementalModel.load(state_file)
+
+    assert model.n_samples == len(raw_data)
+    assert model.age_median == raw_data['Age'].median()
+    assert np.array_equal(model.majority_vote.class_count_, np.bincount(raw_data['Survived']))
+    assert set(drift) == {'coef_drift', 'disagreement', 'accuracy', 'refit_accuracy', 'unseen_categories'}
+    assert drift['unseen_categories'] == 0
+    assert 0 <= drift['disagreement'] <= 1
+    assert drift['accuracy'] > 0.6
+
+
+def test_incremental_vocabulary():
+    raw_data = pipelines.read_raw_data(validation_data)
+    officers = raw_data['Name'].str.contains(r', (?:Capt|Col|Major|Dr|Rev)\.', regex=True)
+
+    model = incremental.IncrementalModel().partial_fit(raw_data[~officers])
+    assert 'Officer' not in model.vocabulary['Title']
+
+    drift = model.drift(raw_data)
+    assert drift['unseen_categories'] == officers.sum()
+
+    model.partial_fit(raw_data[officers])
+    features = models.feature_names(model.vocabulary)
+
+    assert model.vocabulary['Title'][-1] == 'Officer'
+    assert model.logistic_regression.coef_.shape == (1, len(features))
+    assert model.logistic_regression.coef_[0, features.index('Title_Officer')] != 0
+    assert model.drift(raw_data)['unseen_categories'] == 0
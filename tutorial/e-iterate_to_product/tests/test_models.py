@@ -1,6 +1,9 @@
-from titanic import models, data
+from titanic import models, data, pipelines
+import numpy as np
 import pandas as pd
 import os
+import pickle
+import pytest
 from sklearn.metrics import accuracy_score
 
 validation_data = os.path.join(os.path.dirname(__file__), "validation_data/titanic.csv")
@@ -31,3 +34,116 @@ def test_run_logistic_regression():
     accuracy_linear_regression = accuracy_score(y_true=y_test, y_pred=linear_regression.predict(X_test))
 
     assert accuracy_linear_regression > accuracy_majority_vote
+
+
+def test_design_matrix(tmpdir):
+    processed_data = (
+        pd.read_csv(validation_data, usecols=['Name', 'Sex', 'Age', 'Survived'])
+        .pipe(lambda df: df.fillna({'Age': df.Age.median(), }))
+        .pipe(lambda df: df.astype({'Age': 'float64',
+                                    'Name': 'object',
+                                    'Sex': 'category',
+                                    'Survived': 'int64'}))
+        .pipe(data.extract_title)
+    )
+
+    X_train, X_test, y_train, y_test = models.data_preparation(processed_data,
+                                                               test_size=0.2,
+                                                               random_state=0)
+
+    filename = str(tmpdir.join('design_matrix.npy'))
+    X, columns = models.design_matrix(processed_data, filename=filename)
+    train_index, test_index = models.split_indices(len(X), test_size=0.2, random_state=0)
+
+    shared_X = np.load(filename, mmap_mode='r')
+
+    assert columns[:3] == ['Age', 'Sex_female', 'Sex_male']
+    assert shared_X.dtype == np.float32
+    assert np.array_equal(shared_X[train_index], X_train.astype(np.float32))
+    assert np.array_equal(shared_X[test_index], X_test.astype(np.float32))
+
+
+def test_sparse_design_matrix(tmpdir):
+    df = pd.DataFrame({'Age': [22.0, 0.0, 38.0],
+                       'Sex': pd.Categorical(['male', 'female', 'male']),
+                       'Title': pd.Categorical(['Mr', 'Miss', 'Professor']),
+                       'Survived': [0, 1, 1]})
+    vocabulary = {'Sex': ['female', 'male'], 'Title': ['Miss', 'Mr', 'Mrs']}
+
+    filename = str(tmpdir.join('vocabulary.json'))
+    models.save_vocabulary(vocabulary, filename)
+    vocabulary = models.load_vocabulary(filename)
+
+    X, columns = models.sparse_design_matrix(df, vocabulary=vocabulary)
+    dense_X, dense_columns = models.design_matrix(df, vocabulary=vocabulary)
+
+    assert columns == dense_columns == ['Age', 'Sex_female', 'Sex_male',
+                                        'Title_Miss', 'Title_Mr', 'Title_Mrs']
+    # The title Professor is not in the vocabulary and has no dummy
+    assert np.array_equal(X.toarray(), dense_X)
+    assert np.array_equal(dense_X[2], [38, 0, 1, 0, 0, 0])
+
+    majority_vote = models.MajorityVoteClassifier().fit(X, df['Survived'].values)
+    assert len(majority_vote.predict(X)) == 3
+
+
+@pytest.mark.parametrize('search', ['path', 'halving'])
+def test_run_logistic_regression_search(search):
+    processed_data = pipelines.read_titanic_data(validation_data)
+
+    X_train, X_test, y_train, y_test = models.data_preparation(processed_data,
+                                                               test_size=0.2,
+                                                               random_state=0)
+
+    majority_vote = models.run_majority_vote(X_train, X_test, y_train, y_test)
+    linear_regression = models.run_logistic_regression(X_train, X_test, y_train, y_test, search=search)
+
+    # The predictions and the metrics of the test set are cached on the models
+    assert np.array_equal(linear_regression.test_predictions_, linear_regression.predict(X_test))
+    assert linear_regression.evaluation_['accuracy'] == accuracy_score(y_true=y_test,
+                                                                       y_pred=linear_regression.test_predictions_)
+    assert linear_regression.evaluation_['accuracy'] > majority_vote.evaluation_['accuracy']
+
+
+def test_majority_vote_classifier():
+    from sklearn.base import clone
+    from sklearn.exceptions import NotFittedError
+    from sklearn.model_selection import cross_val_score
+
+    X = np.zeros((6, 2))
+    y = np.array([0, 1, 1, 0, 1, 1])
+
+    with pytest.raises(NotFittedError):
+        models.MajorityVoteClassifier().predict(X)
+
+    classifier = models.MajorityVoteClassifier().fit(X, y)
+    predictions = classifier.predict(X)
+
+    assert isinstance(predictions, np.ndarray) and predictions.dtype == y.dtype
+    assert np.array_equal(predictions, np.ones(6))
+    assert np.allclose(classifier.predict_proba(X), [[1 / 3, 2 / 3]] * 6)
+    assert np.array_equal(classifier.classes_, [0, 1])
+    assert clone(classifier).get_params() == {}
+    assert np.array_equal(pickle.loads(pickle.dumps(classifier)).predict(X), predictions)
+    assert len(cross_val_score(models.MajorityVoteClassifier(), X, y, cv=2)) == 2
+
+
+def test_export_scorer():
+    from titanic import scoring
+
+    raw_data = pipelines.read_raw_data(validation_data)
+    processed_data = pipelines.read_titanic_data(validation_data)
+    vocabulary = models.category_vocabulary(processed_data)
+    X_train, X_test, y_train, y_test = models.data_preparation(processed_data,
+                                                               test_size=0.2,
+                                                               random_state=0,
+                                                               vocabulary=vocabulary)
+    model = models.run_logistic_regression(X_train, X_test, y_train, y_test, search='path')
+
+    scorer = models.export_scorer(model, vocabulary, {'Age': processed_data['Age'].median()})
+    predictions, probabilities = scoring.score_records(raw_data.to_dict('records'), scorer)
+
+    X, _ = models.design_matrix(processed_data, vocabulary=vocabulary)
+    assert np.array_equal(scoring.decision_function(X, scorer), model.decision_function(X))
+    assert np.array_equal(predictions, model.predict(X))
+    assert np.allclose(probabilities, model.predict_proba(X)[:, 1], rtol=1e-12, atol=0)
@@ -0,0 +1,41 @@
+from titanic import out_of_core, pipelines, scoring
+import os
+import numpy as np
+
+validation_data = os.path.join(os.path.dirname(__file__), "validation_data/titanic.csv")
+
+
+def test_hash_split():
+    names = pipelines.read_raw_data(validation_data)['Name']
+
+    test = out_of_core.hash_split(names, test_size=0.2, random_state=0)
+
+    assert np.array_equal(test[100:], out_of_core.hash_split(names[100:], test_size=0.2, random_state=0))
+    assert not np.array_equal(test, out_of_core.hash_split(names, test_size=0.2, random_state=1))
+    assert 0.15 < test.mean() < 0.25
+
+
+def test_train_out_of_core():
+    model, metrics = out_of_core.train_out_of_core(validation_data, chunksize=200, random_state=0)
+    _, same_metrics = out_of_core.train_out_of_core(validation_data, chunksize=200, random_state=0)
+
+    raw_data = pipelines.read_raw_data(validation_data)
+
+    assert metrics == same_metrics
+    assert metrics['n_train'] + metrics['n_test'] == len(raw_data)
+    assert model.age_median == raw_data['Age'].median()
+    assert metrics['accuracy'] > metrics['majority_vote_accuracy']
+
+
+def test_out_of_core_artifact(tmpdir):
+    artifact_file = str(tmpdir.join('model.json'))
+    pipelines.run_titanic_training(validation_data, artifact_file, chunksize=300, out_of_core=True)
+    artifact = scoring.load_artifact(artifact_file)
+
+    raw_data = pipelines.read_raw_data(validation_data)
+    model, _ = out_of_core.train_out_of_core(validation_data, chunksize=300)
+    X = scoring.encode(raw_data.to_dict('records'), artifact)
+
+    assert np.allclose(scoring.predict_proba(X, artifact),
+                       model.logistic_regression.predict_proba(model.features(model.process(raw_data)))[:, 1],
+                       atol=1e-5)
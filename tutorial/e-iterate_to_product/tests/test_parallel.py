@@ -0,0 +1,39 @@
+from titanic import parallel
+import joblib
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def reset_parallel():
+    yield
+    parallel.reset()
+
+
+def test_settings(monkeypatch):
+    monkeypatch.setattr(parallel, 'available_cpus', lambda: 8)
+
+    assert parallel.settings() == {'n_jobs': 8, 'backend': 'loky', 'blas_threads': 1, 'max_nbytes': '1M'}
+    assert parallel.settings(n_jobs=64)['n_jobs'] == 8
+    assert parallel.settings(n_jobs=-2)['n_jobs'] == 7
+    assert parallel.settings(n_jobs=2)['blas_threads'] == 4
+
+    monkeypatch.setenv('TITANIC_N_JOBS', '4')
+    monkeypatch.setenv('TITANIC_MAX_NBYTES', 'none')
+    assert parallel.settings()['n_jobs'] == 4
+    assert parallel.settings()['max_nbytes'] is None
+
+    parallel.configure(n_jobs=2, backend='threading')
+    assert parallel.settings()['n_jobs'] == 2
+    assert parallel.settings(n_jobs=1)['n_jobs'] == 1
+    assert parallel.settings()['backend'] == 'threading'
+
+    with pytest.raises(ValueError):
+        parallel.settings(backend='dask')
+
+
+def test_limits():
+    with parallel.limits(n_jobs=1, backend='threading', blas_threads=1) as resolved:
+        results = joblib.Parallel()(joblib.delayed(abs)(-i) for i in range(3))
+
+    assert resolved['backend'] == 'threading'
+    assert results == [0, 1, 2]
@@ -0,0 +1,112 @@
+from titanic import pipelines
+import os
+import pandas as pd
+import pytest
+from pandas.util.testing import assert_frame_equal
+
+validation_data = os.path.join(os.path.dirname(__file__), "validation_data/titanic.csv")
+
+
+def test_streaming_median():
+    ages = pd.read_csv(validation_data, usecols=['Age'])['Age']
+
+    assert pipelines.streaming_median(validation_data, 'Age', chunksize=100) == ages.median()
+    assert pipelines.streaming_median(validation_data, 'Age', chunksize=7) == ages.median()
+
+
+def test_read_titanic_data_in_chunks():
+    expected = pipelines.read_titanic_data(validation_data)
+    result = pipelines.read_titanic_data(validation_data, chunksize=50)
+
+    assert_frame_equal(result, expected)
+
+
+def test_read_titanic_data_columnar(tmpdir):
+    pytest.importorskip('pyarrow')
+
+    expected = pipelines.read_titanic_data(validation_data)
+    raw_data = pd.read_csv(validation_data)
+
+    for filename in ['titanic.parquet', 'titanic.feather']:
+        path = str(tmpdir.join(filename))
+        if filename.endswith('.parquet'):
+            raw_data.to_parquet(path)
+        else:
+            raw_data.to_feather(path)
+
+        # The columnar formats return the columns in the requested order
+        assert_frame_equal(pipelines.read_titanic_data(path), expected, check_like=True)
+        assert_frame_equal(pipelines.read_titanic_data(path, chunksize=100), expected, check_like=True)
+
+
+def test_read_raw_chunks_feather(tmpdir):
+    pytest.importorskip('pyarrow')
+
+    path = str(tmpdir.join('titanic.feather'))
+    # Record batches of 64 rows, re-chunked to 100 rows
+    pd.read_csv(validation_data).to_feather(path, chunksize=64)
+    chunks = list(pipelines.read_raw_chunks(path, chunksize=100))
+
+    assert [len(chunk) for chunk in chunks] == [100] * 8 + [91]
+    assert_frame_equal(pd.concat(chunks), pipelines.read_raw_data(path))
+
+
+def test_load_processed_data_cache(tmpdir):
+    cache_dir = str(tmpdir.join('cache'))
+
+    expected = pipelines.read_titanic_data(validation_data)
+    first = pipelines.load_processed_data(validation_data, cache_dir=cache_dir)
+    second = pipelines.load_processed_data(validation_data, cache_dir=cache_dir)
+
+    # The cache of the processed stage of the pipeline
+    assert [f.split('-')[0] for f in os.listdir(cache_dir)] == ['processed']
+    assert_frame_equal(first, expected)
+    assert_frame_equal(second, expected)
+
+
+calls = []
+
+
+def double(x):
+    calls.append('double')
+    return 2 * x
+
+
+def add(x, y=0):
+    calls.append('add')
+    return x + y
+
+
+def test_pipeline_cache(tmpdir):
+    cache_dir = str(tmpdir.join('cache'))
+
+    def pipeline(y, max_cache_size=2 ** 30):
+        return pipelines.Pipeline([
+            pipelines.Stage('double', double, params={'x': 3}),
+            pipelines.Stage('add', add, inputs=['double'], params={'y': y}),
+        ], cache_dir=cache_dir, max_cache_size=max_cache_size)
+
+    del calls[:]
+    assert pipeline(1).run() == {'double': 6, 'add': 7}
+    assert pipeline(1).run(['add']) == {'add': 7}
+    assert calls == ['double', 'add']
+
+    # Only the stage whose parameters changed runs, without loading its cached input
+    del calls[:]
+    assert pipeline(2).run(['add']) == {'add': 8}
+    assert calls == ['add']
+    assert len(os.listdir(cache_dir)) == 3
+
+    # The least recently used outputs are evicted
+    pipeline(3, max_cache_size=0).run(['add'])
+    assert os.listdir(cache_dir) == []
+
+
+def test_titanic_pipeline(tmpdir):
+    cache_dir = str(tmpdir.join('cache'))
+
+    pipelines.run_titanic_analysis(validation_data, cache_dir=cache_dir, search='path')
+    pipelines.run_titanic_analysis(validation_data, cache_dir=cache_dir, search='halving')
+
+    stages = sorted(f.split('-')[0] for f in os.listdir(cache_dir))
+    assert stages == ['logistic_regression', 'logistic_regression', 'majority_vote', 'processed', 'split']
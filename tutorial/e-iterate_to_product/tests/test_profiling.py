@@ -0,0 +1,25 @@
+from titanic import pipelines, profiling
+import os
+import json
+import logging
+
+validation_data = os.path.join(os.path.dirname(__file__), "validation_data/titanic.csv")
+
+
+def test_profiled_stages(caplog):
+    caplog.set_level(logging.INFO)
+
+    pipelines.read_titanic_data(validation_data)
+    assert not [record for record in caplog.messages if record.startswith('{')]
+
+    profiling.enable()
+    try:
+        pipelines.read_titanic_data(validation_data)
+    finally:
+        profiling.enable(False)
+
+    records = [json.loads(message) for message in caplog.messages if message.startswith('{')]
+
+    assert [record['stage'] for record in records] == ['read', 'fillna', 'astype', 'extract_title']
+    assert all(record['rows'] == 891 for record in records)
+    assert all(record['wall_time'] >= 0 and record['cpu_time'] >= 0 for record in records)
@@ -0,0 +1,46 @@
+from titanic import models, pipelines, registry
+import os
+import json
+import pytest
+
+validation_data = os.path.join(os.path.dirname(__file__), "validation_data/titanic.csv")
+
+
+def test_compare_models():
+    from sklearn.tree import DecisionTreeClassifier
+
+    processed_data = pipelines.read_titanic_data(validation_data)
+    split = models.data_preparation(processed_data, test_size=0.2, random_state=0)
+
+    registry.register('decision_tree', lambda: DecisionTreeClassifier(random_state=0), {'max_depth': [2, 4]})
+    try:
+        leaderboard, fitted = registry.compare_models(*split, names=['majority_vote', 'decision_tree'], n_jobs=2)
+    finally:
+        del registry.REGISTRY['decision_tree']
+
+    assert [row['model'] for row in leaderboard] == ['decision_tree', 'majority_vote']
+    assert leaderboard[0]['params']['max_depth'] in (2, 4)
+    assert all(row['fit_seconds'] > 0 and row['predict_latency_ms'] > 0 for row in leaderboard)
+    assert fitted['majority_vote'].evaluation_['accuracy'] == leaderboard[1]['accuracy']
+
+    with pytest.raises(ValueError):
+        registry.compare_models(*split, names=['oracle'])
+
+    # The workers, their search jobs and the BLAS threads share the budget
+    assert registry.split_budget(2, 8) == (2, 4, 1)
+    assert registry.split_budget(4, 2) == (2, 1, 1)
+    assert registry.split_budget(3, 8) == (3, 2, 1)
+    assert registry.split_budget(1, 1) == (1, 1, 1)
+
+
+def test_run_titanic_analysis_leaderboard(tmpdir):
+    leaderboard_file = str(tmpdir.join('leaderboard.json'))
+
+    pipelines.run_titanic_analysis(validation_data,
+                                   cache_dir=str(tmpdir.join('cache')),
+                                   model_names=['majority_vote', 'random_forest'],
+                                   leaderboard_file=leaderboard_file)
+
+    with open(leaderboard_file) as f:
+        leaderboard = json.load(f)
+    assert {row['model'] for row in leaderboard} == {'majority_vote', 'random_forest'}
@@ -0,0 +1,51 @@
+from titanic import models, pipelines, resampling
+import os
+import json
+import numpy as np
+import pytest
+
+validation_data = os.path.join(os.path.dirname(__file__), "validation_data/titanic.csv")
+
+
+def test_resample_indices():
+    train_index, test_index = resampling.resample_indices(100, method='bootstrap', random_state=0)
+
+    assert len(train_index) == 100
+    assert len(np.intersect1d(train_index, test_index)) == 0
+    assert len(np.union1d(train_index, test_index)) == 100
+
+    with pytest.raises(ValueError):
+        resampling.resample_indices(100, method='jackknife')
+
+
+def test_repeated_evaluation():
+    processed_data = pipelines.read_titanic_data(validation_data)
+    X, _ = models.design_matrix(processed_data, vocabulary=models.category_vocabulary(processed_data))
+    y = processed_data['Survived'].values
+    estimators = {'majority_vote': models.MajorityVoteClassifier()}
+
+    summary, scores = resampling.repeated_evaluation(X, y, estimators, n_repeats=6, processes=2)
+    _, same_scores = resampling.repeated_evaluation(X, y, estimators, n_repeats=6, processes=1)
+
+    accuracies = [report['accuracy'] for report in scores['majority_vote']]
+    train_index, test_index = models.split_indices(len(y), 0.2, random_state=0)
+    expected = np.mean(y[test_index] == np.bincount(y[train_index]).argmax())
+
+    assert scores == same_scores
+    assert accuracies[0] == expected
+    assert summary['majority_vote']['accuracy']['mean'] == pytest.approx(np.mean(accuracies))
+    lower, upper = summary['majority_vote']['accuracy']['confidence_interval']
+    assert lower <= np.mean(accuracies) <= upper
+
+
+def test_run_repeated_evaluation(tmpdir):
+    output = str(tmpdir.join('summary.json'))
+
+    summary = resampling.run_repeated_evaluation(validation_data, n_repeats=4, method='bootstrap',
+                                                 processes=1, output=output)
+
+    with open(output) as f:
+        stored = json.load(f)
+    assert stored['models'].keys() == summary.keys()
+    assert (summary['ridge logistic regression classifier']['accuracy']['mean']
+            > summary['majority vote classifier']['accuracy']['mean'])
@@ -0,0 +1,103 @@
+from titanic import models, pipelines, scoring
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+validation_data = os.path.join(os.path.dirname(__file__), "validation_data/titanic.csv")
+
+
+def test_score_file(tmpdir):
+    artifact_file = str(tmpdir.join('model.json'))
+    output = str(tmpdir.join('predictions.csv'))
+
+    pipelines.run_titanic_training(validation_data, artifact_file, search='path')
+    artifact = scoring.load_artifact(artifact_file)
+
+    n_scored = scoring.score_file(validation_data, artifact, output, batch_size=100)
+    predictions = pd.read_csv(output)
+
+    processed_data = pipelines.read_titanic_data(validation_data)
+    X, _ = models.design_matrix(processed_data, dtype='float64', vocabulary=artifact['vocabulary'])
+    expected = scoring.predict(X, artifact)
+
+    assert n_scored == len(processed_data)
+    assert list(predictions.columns) == ['PassengerId', 'Survived', 'Probability']
+    assert np.array_equal(predictions['Survived'].values, expected)
+
+
+def test_score_files(tmpdir):
+    artifact_file = str(tmpdir.join('model.json'))
+    pipelines.run_titanic_training(validation_data, artifact_file, search='path')
+    artifact = scoring.load_artifact(artifact_file)
+
+    passengers = pd.read_csv(validation_data)
+    os.mkdir(str(tmpdir.join('passengers')))
+    for i in range(3):
+        passengers.iloc[i * 300:(i + 1) * 300].to_csv(str(tmpdir.join('passengers', 'day_{}.csv'.format(i))), index=False)
+
+    filenames = scoring.input_files(str(tmpdir.join('passengers')))
+    output = str(tmpdir.join('predictions.csv'))
+    n_scored = scoring.score_files(filenames, artifact_file, output, processes=2, batch_size=100)
+
+    single_output = str(tmpdir.join('single_predictions.csv'))
+    scoring.score_file(validation_data, artifact, single_output)
+
+    predictions = pd.read_csv(output).sort_values('PassengerId').reset_index(drop=True)
+    expected = pd.read_csv(single_output)
+
+    assert len(filenames) == 3
+    assert n_scored == len(passengers)
+    assert list(predictions.columns) == ['File', 'PassengerId', 'Survived', 'Probability']
+    assert np.array_equal(predictions['Survived'].values, expected['Survived'].values)
+
+
+def test_score_files_columns(tmpdir):
+    artifact_file = str(tmpdir.join('model.json'))
+    pipelines.run_titanic_training(validation_data, artifact_file, search='path')
+
+    passengers = pd.read_csv(validation_data)
+    filenames = [str(tmpdir.join('day_0.csv')), str(tmpdir.join('day_1.csv'))]
+    passengers.iloc[:100].to_csv(filenames[0], index=False)
+    passengers.iloc[100:200].drop(columns='PassengerId').to_csv(filenames[1], index=False)
+
+    with pytest.raises(ValueError, match='PassengerId'):
+        scoring.score_files(filenames, artifact_file, str(tmpdir.join('predictions.csv')), processes=1)
+
+
+def test_artifact_unknown_title(tmpdir):
+    path = str(tmpdir.join('titanic.csv'))
+    artifact_file = str(tmpdir.join('model.json'))
+    passengers = pd.read_csv(validation_data)
+    passengers.loc[:29, 'Name'] = passengers.loc[:29, 'Name'].str.replace(r',[^.]*\.', ', Prof.', regex=True)
+    passengers.to_csv(path, index=False)
+
+    pipelines.run_titanic_training(path, artifact_file, unknown_title='other', search='path')
+    artifact = scoring.load_artifact(artifact_file)
+
+    processed_data = pipelines.read_titanic_data(path, unknown_title='other')
+    X, _ = models.design_matrix(processed_data, vocabulary=artifact['vocabulary'])
+    result = scoring.encode(passengers.to_dict('records'), artifact)
+
+    assert artifact['unknown_title'] == 'other'
+    assert result[:, artifact['column_index']['Title_Other']].sum() == 30
+    assert np.array_equal(result, X)
+
+
+def test_score_file_missing_markers(tmpdir):
+    path = str(tmpdir.join('titanic.csv'))
+    artifact_file = str(tmpdir.join('model.json'))
+    output = str(tmpdir.join('predictions.csv'))
+    passengers = pd.read_csv(validation_data, dtype=str, keep_default_na=False)
+    passengers.loc[4, 'Age'] = 'NA'
+    passengers.loc[5, 'Age'] = 'null'
+    passengers.to_csv(path, index=False)
+
+    pipelines.run_titanic_training(path, artifact_file, search='path')
+    artifact = scoring.load_artifact(artifact_file)
+
+    assert scoring.score_file(path, artifact, output) == len(passengers)
+
+    processed_data = pipelines.read_titanic_data(path)
+    X, _ = models.design_matrix(processed_data, vocabulary=artifact['vocabulary'])
+    assert np.array_equal(pd.read_csv(output)['Survived'].values, scoring.predict(X, artifact))
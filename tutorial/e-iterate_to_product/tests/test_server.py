@@ -0,0 +1,81 @@
+from titanic import pipelines, scoring, server
+import os
+import json
+import asyncio
+import pytest
+
+validation_data = os.path.join(os.path.dirname(__file__), "validation_data/titanic.csv")
+
+
+@pytest.fixture(scope='module')
+def artifact(tmpdir_factory):
+    artifact_file = str(tmpdir_factory.mktemp('artifact').join('model.json'))
+    pipelines.run_titanic_training(validation_data, artifact_file, search='path')
+    return scoring.load_artifact(artifact_file)
+
+
+async def post(port, records):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    responses = []
+    for record in records:
+        body = json.dumps(record).encode()
+        writer.write('POST /predict HTTP/1.1\r\nContent-Length: {}\r\n\r\n'.format(len(body)).encode() + body)
+        await writer.drain()
+        status = (await reader.readline()).decode()
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line == b'\r\n':
+                break
+            key, _, value = line.decode().partition(':')
+            headers[key.lower()] = value.strip()
+        responses.append((status.split(' ')[1], json.loads(await reader.readexactly(int(headers['content-length'])))))
+    writer.close()
+    return responses
+
+
+def test_prediction_server(artifact):
+    records = [
+        {'Name': 'Braund, Mr. Owen Harris', 'Sex': 'male', 'Age': 22},
+        {'Name': 'Cumings, Mrs. John Bradley (Florence Briggs Thayer)', 'Sex': 'female', 'Age': None},
+        {'Name': 'Nameless', 'Sex': 'female', 'Age': '38'},
+    ]
+
+    async def run():
+        prediction_server = server.PredictionServer(artifact)
+        http_server = await prediction_server.start(port=0)
+        port = http_server.sockets[0].getsockname()[1]
+        # Concurrent connections are scored in shared batches
+        results = await asyncio.gather(post(port, records), post(port, records),
+                                       post(port, [{'Name': 'Doe, Mr. John', 'Age': 'old'},
+                                                   {'Name': ['x'], 'Sex': 'male'},
+                                                   {'Name': 'Doe, Mr. John', 'Sex': 1}]))
+        http_server.close()
+        return results
+
+    first, second, invalid = asyncio.run(run())
+
+    X = scoring.encode(records, artifact)
+    expected = [('200', {'Survived': int(survived), 'Probability': float(probability)})
+                for survived, probability in zip(scoring.predict(X, artifact),
+                                                 scoring.predict_proba(X, artifact))]
+
+    assert first == second == expected
+    assert [status for status, _ in invalid] == ['400', '400', '400']
+
+
+def test_prediction_server_error(artifact):
+    prediction_server = server.PredictionServer(artifact)
+
+    def fail(records):
+        raise RuntimeError('failed')
+    prediction_server.score_batch = fail
+
+    async def run():
+        http_server = await prediction_server.start(port=0)
+        port = http_server.sockets[0].getsockname()[1]
+        responses = await post(port, [{'Name': 'Doe, Mr. John', 'Sex': 'male', 'Age': 30}])
+        http_server.close()
+        return responses
+
+    assert asyncio.run(run())[0][0] == '500'
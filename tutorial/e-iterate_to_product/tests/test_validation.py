@@ -0,0 +1,98 @@
+from titanic import pipelines, validation
+import os
+import pandas as pd
+import pytest
+from pandas.util.testing import assert_frame_equal
+
+validation_data = os.path.join(os.path.dirname(__file__), "validation_data/titanic.csv")
+
+
+def corrupted_data(n_rows=891):
+    raw_data = pd.read_csv(validation_data, dtype=str).head(n_rows)
+    raw_data.loc[0, 'Age'] = 'twenty'
+    raw_data.loc[1, 'Survived'] = '2'
+    raw_data.loc[2, 'Name'] = 'Heikkinen Laina'
+    raw_data.loc[3, 'Sex'] = 'unknown'
+    raw_data.loc[4, 'Age'] = '-3'
+    return raw_data
+
+
+def test_validate():
+    raw_data = corrupted_data()
+
+    valid, rejects, summary = validation.validate(raw_data)
+
+    assert len(valid) == len(raw_data) - 5
+    assert valid['Age'].dtype.kind == 'f'
+    assert list(rejects['Rejected']) == ['age_not_numeric', 'survived_invalid', 'name_format',
+                                         'sex_invalid', 'age_out_of_range']
+    assert summary['rows'] == len(raw_data)
+    assert summary['rejected'] == 5
+    assert summary['missing'] == {'Age': 177}
+
+    merged = validation.merge_summaries(summary, summary)
+    assert merged['rejected'] == 10
+    assert merged['rules']['name_format'] == 2
+
+
+def test_check_quality():
+    _, _, summary = validation.validate(corrupted_data())
+
+    validation.check_quality(summary, max_reject_rate=0.01)
+    with pytest.raises(ValueError, match='rejected'):
+        validation.check_quality(summary, max_reject_rate=0.001)
+
+    with pytest.raises(ValueError, match='Survived'):
+        validation.check_columns(['Name', 'Sex', 'Age'])
+
+
+def test_read_titanic_data_validated(tmpdir):
+    path = str(tmpdir.join('titanic.csv'))
+    rejects_file = str(tmpdir.join('rejects.csv'))
+    raw_data = corrupted_data()
+    raw_data.to_csv(path, index=False)
+
+    expected = pipelines.read_titanic_data(validation_data).iloc[5:].reset_index(drop=True)
+    result = pipelines.read_titanic_data(path, validate=True, rejects_file=rejects_file)
+
+    assert_frame_equal(result.reset_index(drop=True), expected, check_dtype=False)
+    assert list(pd.read_csv(rejects_file)['Name']) == list(raw_data['Name'][:5])
+
+    result = pipelines.read_titanic_data(path, chunksize=2, validate=True, rejects_file=rejects_file)
+
+    assert_frame_equal(result.reset_index(drop=True), expected, check_dtype=False)
+    assert len(pd.read_csv(rejects_file)) == 5
+
+    clean_rejects_file = str(tmpdir.join('clean_rejects.csv'))
+    pipelines.read_titanic_data(validation_data, chunksize=100, validate=True, rejects_file=clean_rejects_file)
+
+    assert not os.path.exists(clean_rejects_file)
+
+
+def test_validation_fails_fast(tmpdir):
+    path = str(tmpdir.join('titanic.csv'))
+    raw_data = corrupted_data()
+    raw_data['Survived'] = 'yes'
+    raw_data.to_csv(path, index=False)
+
+    chunks = pipelines.validated_chunks(path, chunksize=100)
+    with pytest.raises(ValueError, match='survived_invalid'):
+        next(chunks)
+
+    raw_data.drop(columns='Sex').to_csv(path, index=False)
+    with pytest.raises(ValueError, match='Sex'):
+        pipelines.read_titanic_data(path, validate=True)
+
+
+def test_file_columns_columnar(tmpdir):
+    pytest.importorskip('pyarrow')
+
+    raw_data = pd.read_csv(validation_data)
+    for filename in ['titanic.parquet', 'titanic.feather']:
+        path = str(tmpdir.join(filename))
+        if filename.endswith('.parquet'):
+            raw_data.to_parquet(path)
+        else:
+            raw_data.to_feather(path)
+
+        assert pipelines.file_columns(path)[:len(raw_data.columns)] == list(raw_data.columns)
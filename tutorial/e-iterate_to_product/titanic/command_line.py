@@ -1,7 +1,8 @@
 import sys
 import logging
+import contextlib
 import click
-from titanic import pipelines
+from titanic import config
 
 logging.basicConfig(
     format='[%(asctime)s|%(module)s.py|%(levelname)s]  %(message)s',
@@ -10,10 +11,303 @@ logging.basicConfig(
     stream=sys.stdout
 )
 
+
+def parallelism_options(command):
+    """Add the options of `titanic.parallel` to a command.
+
+    The unset options fall back to the environment variables of
+    `titanic.parallel` and then to the defaults.
+    """
+    options = [
+        click.option('--n-jobs',
+                     type=int,
+                     default=None,
+                     help='Number of parallel workers of the search, capped by the available processors'),
+        click.option('--backend',
+                     type=click.Choice(config.JOBLIB_BACKENDS),
+                     default=None,
+                     help='Joblib backend of the parallel workers [default: loky]'),
+        click.option('--blas-threads',
+                     type=click.IntRange(min=1),
+                     default=None,
+                     help='BLAS threads per worker [default: processors per worker]'),
+        click.option('--max-nbytes',
+                     default=None,
+                     help="Size above which the arrays are memory-mapped to the workers, 'none' to copy them [default: 1M]"),
+    ]
+    for option in reversed(options):
+        command = option(command)
+    return command
+
+
+def title_cache_context(filename):
+    """Persistent title cache of `titanic.data`, if a file is given."""
+    if filename is None:
+        return contextlib.nullcontext()
+    from titanic import data
+    return data.persistent_title_cache(filename)
+
+
+@click.command()
+@click.option('--filename',
+              type=click.Path(exists=True),
+              prompt='Path to the Titanic CSV file',
+              help='Path to the Titanic CSV, Parquet or Feather file')
+@click.option('--unknown-title',
+              type=click.Choice(config.UNKNOWN_TITLE_POLICIES),
+              default='raise',
+              show_default=True,
+              help='What to do with the titles that cannot be simplified')
+@click.option('--chunksize',
+              type=click.IntRange(min=1),
+              default=None,
+              help='Stream the input file in chunks of this number of rows')
+@click.option('--cache-dir',
+              type=click.Path(file_okay=False),
+              default=None,
+              help='Folder where the outputs of the pipeline stages are cached between runs')
+@click.option('--sparse',
+              is_flag=True,
+              help='One-hot encode the features into a sparse matrix')
+@click.option('--vocabulary',
+              type=click.Path(dir_okay=False),
+              default=None,
+              help='JSON file of the category vocabulary, created if missing')
+@click.option('--search',
+              type=click.Choice(config.SEARCH_METHODS),
+              default='grid',
+              show_default=True,
+              help='Search method of the ridge parameter of the logistic regression')
+@click.option('--profile',
+              is_flag=True,
+              help='Log the time and memory of every stage as JSON')
+@click.option('--title-cache',
+              type=click.Path(dir_okay=False),
+              default=None,
+              help='File of the titles parsed from the names, reused and updated across runs')
+@click.option('--models',
+              multiple=True,
+              help='Registered model to compare in a leaderboard, repeated for several, '
+                   "'all' for all, see titanic.registry")
+@click.option('--leaderboard',
+              type=click.Path(dir_okay=False),
+              default=None,
+              help='JSON file to store the leaderboard of the compared models in')
+@click.option('--validate/--no-validate',
+              default=True,
+              show_default=True,
+              help='Validate the rows right after reading and leave out the rejected ones')
+@click.option('--rejects',
+              type=click.Path(dir_okay=False),
+              default=None,
+              help='CSV file to store the rejected rows in, created only if rows are rejected')
+@click.option('--max-reject-rate',
+              type=click.FloatRange(min=0, max=1),
+              default=0.05,
+              show_default=True,
+              help='Fraction of rejected rows above which the input file is refused')
+@parallelism_options
+def titanic_analysis(filename, unknown_title, chunksize, cache_dir, sparse, vocabulary, search, profile,
+                     title_cache, models, leaderboard, validate, rejects, max_reject_rate,
+                     n_jobs, backend, blas_threads, max_nbytes):
+    from titanic import parallel, pipelines, profiling
+    profiling.enable(profile)
+    parallel.configure(n_jobs=n_jobs, backend=backend, blas_threads=blas_threads, max_nbytes=max_nbytes)
+    with title_cache_context(title_cache):
+        pipelines.run_titanic_analysis(filename,
+                                       unknown_title=unknown_title,
+                                       chunksize=chunksize,
+                                       cache_dir=cache_dir,
+                                       sparse=sparse,
+                                       vocabulary_file=vocabulary,
+                                       search=search,
+                                       model_names=list(models) or None,
+                                       leaderboard_file=leaderboard,
+                                       validate=validate,
+                                       rejects_file=rejects,
+                                       max_reject_rate=max_reject_rate)
+
+
+@click.command()
+@click.option('--filename',
+              type=click.Path(exists=True),
+              prompt='Path to the Titanic CSV file',
+              help='Path to the Titanic CSV, Parquet or Feather file')
+@click.option('--artifact',
+              type=click.Path(dir_okay=False),
+              required=True,
+              help='Path of the JSON model artifact to create')
+@click.option('--unknown-title',
+              type=click.Choice(config.UNKNOWN_TITLE_POLICIES),
+              default='raise',
+              show_default=True,
+              help='What to do with the titles that cannot be simplified')
+@click.option('--chunksize',
+              type=click.IntRange(min=1),
+              default=None,
+              help='Stream the input file in chunks of this number of rows')
+@click.option('--cache-dir',
+              type=click.Path(file_okay=False),
+              default=None,
+              help='Folder where the processed data is cached between runs')
+@click.option('--search',
+              type=click.Choice(config.SEARCH_METHODS),
+              default='grid',
+              show_default=True,
+              help='Search method of the ridge parameter of the logistic regression')
+@click.option('--out-of-core',
+              is_flag=True,
+              help='Train a mini-batch logistic regression streaming the file in chunks of --chunksize rows')
+@click.option('--random-state',
+              type=int,
+              default=0,
+              show_default=True,
+              help='Seed of the train and test split and of the training')
+@click.option('--title-cache',
+              type=click.Path(dir_okay=False),
+              default=None,
+              help='File of the titles parsed from the names, reused and updated across runs')
+@parallelism_options
+def titanic_train(filename, artifact, unknown_title, chunksize, cache_dir, search, out_of_core, random_state,
+                  title_cache, n_jobs, backend, blas_threads, max_nbytes):
+    if out_of_core and chunksize is None:
+        raise click.UsageError('--out-of-core needs --chunksize')
+    from titanic import parallel, pipelines
+    parallel.configure(n_jobs=n_jobs, backend=backend, blas_threads=blas_threads, max_nbytes=max_nbytes)
+    with title_cache_context(title_cache):
+        pipelines.run_titanic_training(filename,
+                                       artifact,
+                                       unknown_title=unknown_title,
+                                       chunksize=chunksize,
+                                       cache_dir=cache_dir,
+                                       search=search,
+                                       out_of_core=out_of_core,
+                                       random_state=random_state)
+
+
+@click.command()
+@click.option('--filename',
+              prompt='Path to the CSV file of the passengers',
+              help='CSV file of the passengers to score, or a directory or a glob pattern of CSV files')
+@click.option('--artifact',
+              type=click.Path(exists=True, dir_okay=False),
+              required=True,
+              help='Path of the JSON model artifact created by titanic_train')
+@click.option('--output',
+              type=click.Path(dir_okay=False),
+              required=True,
+              help='Path of the CSV file of the predictions')
+@click.option('--batch-size',
+              type=click.IntRange(min=1),
+              default=100000,
+              show_default=True,
+              help='Number of passengers scored at once')
+@click.option('--processes',
+              type=click.IntRange(min=1),
+              default=None,
+              help='Number of processes scoring many files, by default the available processors')
+def titanic_score(filename, artifact, output, batch_size, processes):
+    # Only numpy is loaded, see `titanic.scoring`
+    from titanic import scoring
+    filenames = scoring.input_files(filename)
+    if not filenames:
+        raise click.BadParameter('No CSV file matches {}'.format(filename), param_hint='--filename')
+    if filenames == [filename]:
+        scoring.score_file(filename, scoring.load_artifact(artifact), output, batch_size=batch_size)
+    else:
+        scoring.score_files(filenames, artifact, output, processes=processes, batch_size=batch_size)
+
+
+@click.command()
+@click.option('--artifact',
+              type=click.Path(exists=True, dir_okay=False),
+              required=True,
+              help='Path of the JSON model artifact created by titanic_train')
+@click.option('--host',
+              default='127.0.0.1',
+              show_default=True,
+              help='Address the server listens on')
+@click.option('--port',
+              type=click.IntRange(min=0, max=65535),
+              default=8000,
+              show_default=True,
+              help='Port the server listens on')
+@click.option('--max-batch-size',
+              type=click.IntRange(min=1),
+              default=256,
+              show_default=True,
+              help='Maximum number of concurrent requests scored at once')
+def titanic_serve(artifact, host, port, max_batch_size):
+    from titanic import server
+    server.run_server(artifact, host=host, port=port, max_batch_size=max_batch_size)
+
+
+@click.command()
+@click.option('--filename',
+              type=click.Path(exists=True),
+              prompt='Path to the file of the new passengers',
+              help='Path to the CSV, Parquet or Feather file of the new passengers')
+@click.option('--state',
+              type=click.Path(dir_okay=False),
+              required=True,
+              help='Pickle file of the incremental model, created if missing')
+@click.option('--full-data',
+              type=click.Path(exists=True),
+              default=None,
+              help='File of all the passengers, to report the drift from a full refit')
+@click.option('--chunksize',
+              type=click.IntRange(min=1),
+              default=None,
+              help='Update the model with chunks of this number of rows')
+def titanic_update(filename, state, full_data, chunksize):
+    from titanic import incremental
+    incremental.run_incremental_update(filename, state, full_data=full_data, chunksize=chunksize)
+
+
 @click.command()
 @click.option('--filename',
               type=click.Path(exists=True),
               prompt='Path to the Titanic CSV file',
-              help='Path to the Titanic CSV file')
-def titanic_analysis(filename):
-    pipelines.run_titanic_analysis(filename)
+              help='Path to the Titanic CSV, Parquet or Feather file')
+@click.option('--repeats',
+              type=click.IntRange(min=1),
+              default=100,
+              show_default=True,
+              help='Number of random splits or bootstrap resamples')
+@click.option('--method',
+              type=click.Choice(config.RESAMPLING_METHODS),
+              default='split',
+              show_default=True,
+              help='Random train and test splits, or bootstrap resamples tested on the left out rows')
+@click.option('--processes',
+              type=click.IntRange(min=1),
+              default=None,
+              help='Number of worker processes, by default the available processors')
+@click.option('--unknown-title',
+              type=click.Choice(config.UNKNOWN_TITLE_POLICIES),
+              default='raise',
+              show_default=True,
+              help='What to do with the titles that cannot be simplified')
+@click.option('--cache-dir',
+              type=click.Path(file_okay=False),
+              default=None,
+              help='Folder where the processed data is cached between runs')
+@click.option('--random-state',
+              type=int,
+              default=0,
+              show_default=True,
+              help='Seed of the first resample')
+@click.option('--output',
+              type=click.Path(dir_okay=False),
+              default=None,
+              help='JSON file to store the means and confidence intervals in')
+def titanic_evaluate(filename, repeats, method, processes, unknown_title, cache_dir, random_state, output):
+    from titanic import resampling
+    resampling.run_repeated_evaluation(filename,
+                                       n_repeats=repeats,
+                                       method=method,
+                                       processes=processes,
+                                       unknown_title=unknown_title,
+                                       cache_dir=cache_dir,
+                                       random_state=random_state,
+                                       output=output)
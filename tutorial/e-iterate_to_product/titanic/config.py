@@ -0,0 +1,50 @@
+"""Constants shared by the data processing, the models and the command line.
+
+This module must not import pandas or scikit-learn, so that the command line
+and the scoring can use these constants without loading them.
+"""
+import re
+
+SIMPLIFY_TITLE = {
+    "Capt": "Officer",
+    "Col": "Officer",
+    "Major": "Officer",
+    "Jonkheer": "Royalty",
+    "Don": "Royalty",
+    "Sir": "Royalty",
+    "Dr": "Officer",
+    "Rev": "Officer",
+    "the Countess": "Royalty",
+    "Dona": "Royalty",
+    "Mme": "Mrs",
+    "Mlle": "Miss",
+    "Ms": "Mrs",
+    "Mr": "Mr",
+    "Mrs": "Mrs",
+    "Miss": "Miss",
+    "Master": "Master",
+    "Lady": "Royalty"
+}
+
+# Example: Uruchurtu, Don. Manuel E --> Don
+# The title is the text between the first comma and the following dot.
+TITLE_PATTERN = re.compile(r'^[^,]*,([^,.]*)')
+
+# Markers of the missing values in the CSV files, the defaults of
+# `pandas.read_csv`, so that the scoring reads the files as the training
+NA_VALUES = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'n/a', 'nan', 'null',
+])
+
+# Policies for the titles that are missing from `SIMPLIFY_TITLE`
+UNKNOWN_TITLE_POLICIES = ('raise', 'other', 'quarantine')
+
+# Search methods of the ridge parameter of the logistic regression
+SEARCH_METHODS = ('grid', 'path', 'halving')
+
+# Joblib backends of the parallel model searches
+JOBLIB_BACKENDS = ('loky', 'multiprocessing', 'threading')
+
+# Resampling methods of the repeated evaluation of the models
+RESAMPLING_METHODS = ('split', 'bootstrap')
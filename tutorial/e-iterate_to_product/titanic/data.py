@@ -1,13 +1,206 @@
+import pickle
 import logging
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from titanic import profiling
+from titanic.config import SIMPLIFY_TITLE, TITLE_PATTERN, UNKNOWN_TITLE_POLICIES
 
 
-def extract_title(df):
+class TitleCache:
+    """Bounded cache of the raw titles parsed from the names.
+
+    The raw titles are cached rather than the simplified ones, so that the
+    cache stays valid when `SIMPLIFY_TITLE` changes. The least recently used
+    names are evicted beyond `max_size` names.
+
+    The names are looked up all at once with `pandas.Index.get_indexer`. The
+    names added since the last merge are kept in a small index of their own,
+    so that the hash table of the large index is rebuilt only when the small
+    one has grown to a fraction of it, or when names are evicted.
+
+    Parameters
+    ----------
+    max_size: int
+        Maximum number of cached names
+    """
+    def __init__(self, max_size=10 ** 6):
+        self.max_size = max_size
+        self._names = pd.Index([], dtype=object)
+        self._recent = pd.Index([], dtype=object)
+        # Raw titles and times of last use of the names of both indexes
+        self._titles = np.empty(0, dtype=object)
+        self._used = np.empty(0, dtype=np.int64)
+        self._clock = 0
+
+    def __len__(self):
+        return len(self._titles)
+
+    @property
+    def titles(self):
+        """Raw titles by name, from the least to the most recently used."""
+        order = np.argsort(self._used, kind='stable')
+        return dict(zip(self._names.append(self._recent)[order], self._titles[order]))
+
+    def _tick(self, n):
+        ticks = np.arange(self._clock, self._clock + n)
+        self._clock += n
+        return ticks
+
+    def _positions(self, names):
+        positions = self._names.get_indexer(names)
+        missing = np.flatnonzero(positions < 0)
+        if len(missing) and len(self._recent):
+            recent = self._recent.get_indexer(names[missing])
+            found = recent >= 0
+            positions[missing[found]] = len(self._names) + recent[found]
+        return positions
+
+    def lookup(self, names):
+        """Raw titles of distinct names, None for the unparsable ones.
+
+        Returns
+        -------
+        tuple
+            Array of the raw titles of the cached names and boolean mask of
+            the names that are not cached
+        """
+
+        positions = self._positions(pd.Index(names, dtype=object))
+        found = positions >= 0
+        # Used in the order of the names
+        self._used[positions[found]] = self._tick(np.count_nonzero(found))
+
+        titles = np.full(len(names), None, dtype=object)
+        titles[found] = self._titles[positions[found]]
+        return titles, ~found
+
+    def update(self, names, titles):
+        """Cache the raw titles of distinct names missing from the cache, None for the unparsable ones."""
+        self._recent = self._recent.append(pd.Index(names, dtype=object))
+        self._titles = np.concatenate([self._titles, np.array(titles, dtype=object)])
+        self._used = np.concatenate([self._used, self._tick(len(names))])
+
+        if len(self) > self.max_size:
+            # Keep the most recently used names, in their order in the cache
+            keep = np.sort(np.argpartition(self._used, len(self) - self.max_size)[len(self) - self.max_size:])
+            self._names = self._names.append(self._recent)[keep]
+            self._recent = pd.Index([], dtype=object)
+            self._titles = self._titles[keep]
+            self._used = self._used[keep]
+        elif len(self._recent) > len(self._names) // 8:
+            self._names = self._names.append(self._recent)
+            self._recent = pd.Index([], dtype=object)
+
+    def save(self, filename):
+        with open(filename, 'wb') as f:
+            pickle.dump(self.titles, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, filename, max_size=10 ** 6):
+        """Cache saved in `filename`, empty if the file does not exist."""
+        cache = cls(max_size)
+        try:
+            with open(filename, 'rb') as f:
+                titles = pickle.load(f)
+            cache.update(list(titles), list(titles.values()))
+        except FileNotFoundError:
+            pass
+        return cache
+
+
+# Cache used by `extract_title` when none is given, see `persistent_title_cache`
+_title_cache = None
+
+
+@contextmanager
+def persistent_title_cache(filename, max_size=10 ** 6):
+    """Use a title cache persisted in `filename` within the enclosed block.
+
+    The cache is loaded from the file, if it exists, used by all the calls of
+    `extract_title` within the block, and saved back to the file at the end,
+    so that the names parsed in a run are not parsed again in the next runs.
+
+    Parameters
+    ----------
+    filename: str
+        Path of the pickled cache
+    max_size: int
+        Maximum number of cached names
+
+    Yields
+    ------
+    TitleCache
+    """
+
+    global _title_cache
+    cache = TitleCache.load(filename, max_size)
+    logging.info('Loaded {} cached titles from {}'.format(len(cache), filename))
+    previous, _title_cache = _title_cache, cache
+    try:
+        yield cache
+    finally:
+        _title_cache = previous
+        cache.save(filename)
+
+
+def parse_titles(names, title_cache=None):
+    """Raw titles of distinct names, NaN for the unparsable ones.
+
+    Parameters
+    ----------
+    names: pandas.Index
+        Distinct names
+    title_cache: TitleCache, optional
+        Cache of the titles, only the names missing from it are parsed
+
+    Returns
+    -------
+    pandas.Categorical
+    """
+
+    if title_cache is None:
+        return pd.Categorical(names.str.extract(TITLE_PATTERN, expand=False).str.strip())
+
+    titles, missing = title_cache.lookup(names)
+    if missing.any():
+        parsed = names[missing].str.extract(TITLE_PATTERN, expand=False).str.strip()
+        parsed = [title if isinstance(title, str) else None for title in parsed]
+        titles[missing] = parsed
+        title_cache.update(names[missing], parsed)
+    logging.info('Parsed {} names, {} titles found in the cache'.format(
+        np.count_nonzero(missing), len(names) - np.count_nonzero(missing)))
+
+    return pd.Categorical(titles)
+
+
+@profiling.profiled('extract_title')
+def extract_title(df, unknown_title='raise', title_cache=None):
     """Extract the title from the passenger names.
 
+    The titles are parsed with a vectorized regular expression over the
+    distinct names only, and simplified through the categories of the parsed
+    titles, so that the mapping is applied once per distinct title instead of
+    once per row. With a title cache, only the distinct names missing from it
+    are parsed.
+
+    The names whose title cannot be parsed or simplified are counted and
+    handled according to `unknown_title`:
+
+    - ``'raise'``: raise a `KeyError` listing the unknown titles;
+    - ``'other'``: assign the title ``'Other'``;
+    - ``'quarantine'``: leave the title missing, so that the rows can be
+      separated with `quarantine_unknown_titles`.
+
     Parameters
     ----------
     df : pandas.DataFrame
         Data-frame containing the column `Name`
+    unknown_title : str
+        Policy for the unknown titles, one of `UNKNOWN_TITLE_POLICIES`
+    title_cache : TitleCache, optional
+        Cache of the raw titles by name, by default that of
+        `persistent_title_cache`, if any
 
     Returns
     -------
@@ -17,38 +210,63 @@ def extract_title(df):
 
     logging.info("Extracting the titles from the name column")
 
-    simplify_title = {
-        "Capt": "Officer",
-        "Col": "Officer",
-        "Major": "Officer",
-        "Jonkheer": "Royalty",
-        "Don": "Royalty",
-        "Sir": "Royalty",
-        "Dr": "Officer",
-        "Rev": "Officer",
-        "the Countess": "Royalty",
-        "Dona": "Royalty",
-        "Mme": "Mrs",
-        "Mlle": "Miss",
-        "Ms": "Mrs",
-        "Mr": "Mr",
-        "Mrs": "Mrs",
-        "Miss": "Miss",
-        "Master": "Master",
-        "Lady": "Royalty"
-    }
-
-    title = df['Name'].apply(
-        lambda full_name: (
-            simplify_title[
-                # Example: Uruchurtu, Don. Manuel E --> Don
-                full_name.split(',')[1].split('.')[0].strip()
-            ]
+    if unknown_title not in UNKNOWN_TITLE_POLICIES:
+        raise ValueError("The unknown title policy has to be one of {}".format(
+            ', '.join(UNKNOWN_TITLE_POLICIES)))
+
+    # Parse each distinct name once and broadcast back through the codes
+    name_codes, names = pd.factorize(df['Name'])
+    raw_title = parse_titles(names, _title_cache if title_cache is None else title_cache)
+
+    simplified = raw_title.categories.map(SIMPLIFY_TITLE)
+
+    title_codes, categories = pd.factorize(simplified, sort=True)
+    # The code -1 of missing values is mapped onto the appended -1
+    title_codes = np.append(title_codes, -1)[raw_title.codes]
+    codes = np.append(title_codes, -1)[name_codes]
+
+    unknown = codes == -1
+    n_unknown = np.count_nonzero(unknown)
+    if n_unknown:
+        unknown_titles = ', '.join(
+            list(raw_title.categories[simplified.isna()])
+            + (['<unparsable>'] if (raw_title.codes == -1).any() else [])
         )
-    )
+        logging.warning("Found {} names with unknown titles: {}".format(
+            n_unknown, unknown_titles))
+
+        if unknown_title == 'raise':
+            raise KeyError("Unknown titles: {}".format(unknown_titles))
+        elif unknown_title == 'other':
+            if 'Other' not in categories:
+                categories = categories.append(pd.Index(['Other']))
+            codes[unknown] = categories.get_loc('Other')
+
+    title = pd.Categorical.from_codes(codes, categories=categories)
+    if not categories.is_monotonic_increasing:
+        title = title.reorder_categories(categories.sort_values())
+
+    # Shallow copy: the new column is added without copying the data
+    df = df.copy(deep=False)
+    df['Title'] = title
+
+    return df
+
+
+def quarantine_unknown_titles(df):
+    """Separate the passengers whose title could not be simplified.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Data-frame returned by `extract_title` with the policy ``'quarantine'``
+
+    Returns
+    -------
+    tuple of pandas.DataFrame
+        Passengers with a known title and quarantined passengers
+    """
 
-    merged = df.merge(title.to_frame(name='Title'),
-                      left_index=True, right_index=True)
-    merged['Title'] = merged['Title'].astype('category')
+    unknown = df['Title'].isna().values
 
-    return merged
+    return df[~unknown], df[unknown]
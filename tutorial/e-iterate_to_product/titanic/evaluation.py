@@ -0,0 +1,164 @@
+"""Evaluation metrics of the binary survival predictions.
+
+An `Evaluation` accumulates, chunk by chunk, counts from which all the
+metrics are computed at the end: the confusion matrix, the sum of the
+log-losses, a fine histogram of the scores of each class for the ROC-AUC and
+the sums of the calibration bins. Each chunk is processed with a few
+vectorized `numpy.bincount`, and the memory does not depend on the number of
+evaluated passengers, so test sets too large to score at once are evaluated
+in chunks with the same results.
+
+The ROC-AUC is computed from the histogram of the scores, counting the pairs
+of passengers in the same bin as ties; with the default 10,000 bins it
+differs from the exact value by less than 1e-4 in practice.
+"""
+import logging
+import numpy as np
+
+EPSILON = 1e-15
+
+
+class Evaluation:
+    """Accumulator of the metrics of binary predictions.
+
+    Parameters
+    ----------
+    n_bins: int
+        Number of bins of the histogram of the scores for the ROC-AUC
+    n_calibration_bins: int
+        Number of equal-width bins of the predicted probabilities for the
+        calibration
+    """
+    def __init__(self, n_bins=10 ** 4, n_calibration_bins=10):
+        self.n_bins = n_bins
+        self.n_calibration_bins = n_calibration_bins
+        self.confusion = np.zeros((2, 2), dtype=np.int64)
+        self.log_loss_sum = 0.
+        self.histogram = np.zeros((2, n_bins), dtype=np.int64)
+        self.calibration_count = np.zeros(n_calibration_bins, dtype=np.int64)
+        self.calibration_score = np.zeros(n_calibration_bins)
+        self.calibration_positive = np.zeros(n_calibration_bins)
+
+    def update(self, y_true, y_score, y_pred=None):
+        """Accumulate a chunk of predictions.
+
+        Parameters
+        ----------
+        y_true: numpy.ndarray
+            True classes, 0 or 1
+        y_score: numpy.ndarray
+            Predicted probabilities of the class 1
+        y_pred: numpy.ndarray, optional
+            Predicted classes, by default the scores above 0.5
+
+        Returns
+        -------
+        Evaluation
+        """
+
+        y_true = np.asarray(y_true, dtype=np.intp)
+        y_score = np.asarray(y_score, dtype=np.float64)
+        y_pred = (y_score > 0.5).astype(np.intp) if y_pred is None else np.asarray(y_pred, dtype=np.intp)
+
+        self.confusion += np.bincount(2 * y_true + y_pred, minlength=4).reshape(2, 2)
+
+        clipped = np.clip(y_score, EPSILON, 1 - EPSILON)
+        self.log_loss_sum -= np.sum(np.log(np.where(y_true == 1, clipped, 1 - clipped)))
+
+        bins = np.minimum((y_score * self.n_bins).astype(np.intp), self.n_bins - 1)
+        self.histogram += np.bincount(y_true * self.n_bins + bins,
+                                      minlength=2 * self.n_bins).reshape(2, self.n_bins)
+
+        bins = np.minimum((y_score * self.n_calibration_bins).astype(np.intp), self.n_calibration_bins - 1)
+        self.calibration_count += np.bincount(bins, minlength=self.n_calibration_bins)
+        self.calibration_score += np.bincount(bins, weights=y_score, minlength=self.n_calibration_bins)
+        self.calibration_positive += np.bincount(bins, weights=y_true, minlength=self.n_calibration_bins)
+
+        return self
+
+    @property
+    def n_samples(self):
+        return int(self.confusion.sum())
+
+    def roc_auc(self):
+        """Area under the ROC curve, NaN if only one class was evaluated."""
+        negatives, positives = self.histogram
+        n_negatives, n_positives = negatives.sum(), positives.sum()
+        if not n_negatives or not n_positives:
+            return np.nan
+        # Pairs of a positive with a negative of lower score, ties count half
+        lower_negatives = np.cumsum(negatives) - negatives
+        return float(np.sum(positives * (lower_negatives + negatives / 2)) / (n_negatives * n_positives))
+
+    def report(self):
+        """Metrics of the accumulated predictions.
+
+        Returns
+        -------
+        dict
+            Number of samples, accuracy, confusion matrix with the true
+            classes as rows, ROC-AUC, log-loss and calibration, a list of the
+            non-empty bins with their mean predicted probability and fraction
+            of positives
+        """
+
+        n_samples = self.n_samples
+        filled = np.flatnonzero(self.calibration_count)
+
+        return {
+            'n_samples': n_samples,
+            'accuracy': float(np.trace(self.confusion) / n_samples),
+            'confusion_matrix': self.confusion.tolist(),
+            'roc_auc': self.roc_auc(),
+            'log_loss': float(self.log_loss_sum / n_samples),
+            'calibration': [
+                {'lower': float(i / self.n_calibration_bins),
+                 'upper': float((i + 1) / self.n_calibration_bins),
+                 'count': int(self.calibration_count[i]),
+                 'mean_predicted': float(self.calibration_score[i] / self.calibration_count[i]),
+                 'fraction_positive': float(self.calibration_positive[i] / self.calibration_count[i])}
+                for i in filled
+            ],
+        }
+
+
+def evaluate(model, X, y, chunksize=None):
+    """Predict once and evaluate a fitted classifier.
+
+    The class probabilities are computed once per chunk, and the predicted
+    classes derived from them, as in `predict`.
+
+    Parameters
+    ----------
+    model: sklearn.base.ClassifierMixin
+        Fitted binary classifier with `predict_proba`, of classes 0 and 1
+    X: numpy.ndarray or scipy.sparse.csr_matrix
+    y: numpy.ndarray
+    chunksize: int, optional
+        Number of rows scored at once, if None all the rows are scored at once
+
+    Returns
+    -------
+    tuple
+        Report of `Evaluation.report` and predicted classes
+    """
+
+    n_samples = X.shape[0]
+    chunksize = chunksize or max(n_samples, 1)
+
+    classes = np.asarray(model.classes_)
+    evaluation = Evaluation()
+    predictions = np.empty(n_samples, dtype=classes.dtype)
+    for start in range(0, n_samples, chunksize):
+        stop = min(start + chunksize, n_samples)
+        probabilities = model.predict_proba(X[start:stop])
+        predictions[start:stop] = classes.take(np.argmax(probabilities, axis=1))
+        evaluation.update(y[start:stop], probabilities[:, 1], predictions[start:stop])
+
+    return evaluation.report(), predictions
+
+
+def log_report(name, report):
+    logging.info('The prediction accuracy with the {} is {:.1f}%'.format(name, report['accuracy'] * 100))
+    logging.info('The ROC-AUC with the {} is {:.3f} and the log-loss {:.3f}'.format(
+        name, report['roc_auc'], report['log_loss']))
@@ -0,0 +1,264 @@
+"""Incremental training on new batches of passengers.
+
+The state of an `IncrementalModel` holds everything needed to update the
+models with a new batch only: the class counts of the majority vote, the
+counts of the distinct ages, from which the exact median age is recomputed,
+the category vocabulary, grown with the categories of each batch, and a
+logistic regression trained by stochastic gradient descent with
+`partial_fit`.
+"""
+import copy
+import pickle
+import logging
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.linear_model import SGDClassifier
+from titanic import models, pipelines
+
+
+def format_categories(categories):
+    """Text of lists of categories by column, as ``Title=Dr, Title=Rev``."""
+    return ', '.join('{}={}'.format(column, category)
+                     for column, values in categories.items() for category in values)
+
+
+class IncrementalModel:
+    """Majority vote and logistic regression updated batch by batch.
+
+    The categories first seen in a later batch are appended to the
+    vocabulary, and their dummies start with a zero coefficient, so that the
+    model learns them from that batch on. The scaling of the ages is fixed by
+    the first batch.
+
+    Parameters
+    ----------
+    alpha: float
+        Strength of the ridge penalty of the logistic regression
+    n_epochs: int
+        Passes of stochastic gradient descent over each batch
+    random_state: int
+    """
+    def __init__(self, alpha=1e-3, n_epochs=5, random_state=0):
+        self.alpha = alpha
+        self.n_epochs = n_epochs
+        self.random_state = random_state
+        self.age_counts = pd.Series(dtype='int64')
+        self.vocabulary = None
+        self.age_scale = None
+        self.n_samples = 0
+        self.majority_vote = models.MajorityVoteClassifier()
+        self.logistic_regression = SGDClassifier(loss='log_loss', alpha=alpha,
+                                                 random_state=random_state)
+
+    @property
+    def age_median(self):
+        return pipelines.median_from_counts(self.age_counts)
+
+    def features(self, processed_data):
+        """Design matrix of processed passengers, with the ages scaled.
+
+        The ages are centred and scaled with the mean and standard deviation of
+        the first batch, which keeps the gradient steps of the same size for
+        all the features.
+        """
+        X, _ = models.design_matrix(processed_data, vocabulary=self.vocabulary)
+        mean, std = self.age_scale
+        X[:, 0] = (X[:, 0] - mean) / std
+        return X
+
+    def process(self, raw_data):
+        """Processed passengers, with the missing ages filled with the running median."""
+        return pipelines.process_data(raw_data, self.age_median)
+
+    def _new_categories(self, processed_data):
+        """Categories of processed passengers missing from the vocabulary, and number of these passengers."""
+        new = {column: [category for category in categories if category not in self.vocabulary[column]]
+               for column, categories in models.category_vocabulary(processed_data).items()}
+        unseen = np.zeros(len(processed_data), dtype=bool)
+        for column, categories in new.items():
+            unseen |= processed_data[column].isin(categories).values
+        return new, int(np.count_nonzero(unseen))
+
+    def _grow(self, model, vocabulary):
+        """Pad the coefficients of a logistic regression for a grown vocabulary."""
+        names = models.feature_names(vocabulary)
+        position = {name: i for i, name in enumerate(names)}
+        coef = np.zeros((1, len(names)), dtype=model.coef_.dtype)
+        coef[0, [position[name] for name in models.feature_names(self.vocabulary)]] = model.coef_[0]
+        model.coef_ = coef
+        model.n_features_in_ = len(names)
+
+    def _sgd_epochs(self, model, X, y, seed):
+        rng = np.random.RandomState(seed)
+        for _ in range(self.n_epochs):
+            order = rng.permutation(len(y))
+            model.partial_fit(X[order], y[order], classes=[0, 1])
+
+    def partial_fit(self, raw_data):
+        """Update the state and the models with a batch of raw passengers.
+
+        Parameters
+        ----------
+        raw_data: pandas.DataFrame
+            Passengers with the columns `pipelines.COLUMNS`
+
+        Returns
+        -------
+        IncrementalModel
+        """
+
+        self.age_counts = self.age_counts.add(raw_data['Age'].value_counts(), fill_value=0)
+        processed_data = self.process(raw_data)
+
+        if self.vocabulary is None:
+            self.vocabulary = models.category_vocabulary(processed_data)
+            ages = processed_data['Age'].values
+            self.age_scale = (float(ages.mean()), float(ages.std()) or 1.0)
+        else:
+            new, n_unseen = self._new_categories(processed_data)
+            if n_unseen:
+                logging.warning('Adding the new categories {} of {} passengers to the vocabulary'.format(
+                    format_categories(new), n_unseen))
+                vocabulary = {column: self.vocabulary[column] + new[column] for column in self.vocabulary}
+                self._grow(self.logistic_regression, vocabulary)
+                self.vocabulary = vocabulary
+
+        X = self.features(processed_data)
+        y = processed_data['Survived'].values
+
+        self.majority_vote.partial_fit(X, y)
+        self._sgd_epochs(self.logistic_regression, X, y, seed=self.random_state + self.n_samples)
+
+        self.n_samples += len(y)
+        logging.info('Updated the incremental models with {} passengers, {} in total'.format(
+            len(y), self.n_samples))
+
+        return self
+
+    def predict(self, raw_data):
+        """Survival predictions of the logistic regression for raw passengers."""
+        return self.logistic_regression.predict(self.features(self.process(raw_data)))
+
+    def coefficients(self):
+        """Coefficients and intercept of the logistic regression on the unscaled ages.
+
+        These are the coefficients of the raw design matrix of
+        `models.design_matrix`, as stored in the scoring artifacts.
+        """
+
+        mean, std = self.age_scale
+        coef = self.logistic_regression.coef_[0].astype('float64')
+        intercept = float(self.logistic_regression.intercept_[0]) - coef[0] * mean / std
+        coef[0] = coef[0] / std
+        return coef, intercept
+
+    def drift(self, raw_data):
+        """Difference between the incremental model and a full refit.
+
+        A logistic regression with the same parameters is trained on
+        `raw_data` at once, typically all the passengers seen so far, and
+        compared with the incremental one. The categories of `raw_data`
+        missing from the vocabulary are counted, and get a dummy with a zero
+        coefficient in the incremental model for the comparison.
+
+        Parameters
+        ----------
+        raw_data: pandas.DataFrame
+            Passengers with the columns `pipelines.COLUMNS`
+
+        Returns
+        -------
+        dict
+            Relative distance between the coefficients, fraction of the
+            passengers with different predictions, accuracy of both models
+            on `raw_data` and number of its passengers with categories
+            missing from the vocabulary
+        """
+
+        processed_data = self.process(raw_data)
+        y = processed_data['Survived'].values
+
+        new, n_unseen = self._new_categories(processed_data)
+        if n_unseen:
+            logging.warning('{} passengers have the categories {} missing from the vocabulary'.format(
+                n_unseen, format_categories(new)))
+
+        # Copy of the incremental model on the vocabulary of the refit
+        incremental = copy.deepcopy(self)
+        vocabulary = {column: self.vocabulary[column] + new[column] for column in self.vocabulary}
+        incremental._grow(incremental.logistic_regression, vocabulary)
+        incremental.vocabulary = vocabulary
+        X = incremental.features(processed_data)
+
+        refit = clone(self.logistic_regression)
+        self._sgd_epochs(refit, X, y, seed=self.random_state)
+
+        coef = np.append(incremental.logistic_regression.coef_, incremental.logistic_regression.intercept_)
+        refit_coef = np.append(refit.coef_, refit.intercept_)
+        predictions = incremental.logistic_regression.predict(X)
+        refit_predictions = refit.predict(X)
+
+        return {
+            'coef_drift': float(np.linalg.norm(coef - refit_coef) / np.linalg.norm(refit_coef)),
+            'disagreement': float(np.mean(predictions != refit_predictions)),
+            'accuracy': float(np.mean(predictions == y)),
+            'refit_accuracy': float(np.mean(refit_predictions == y)),
+            'unseen_categories': n_unseen,
+        }
+
+    def save(self, filename):
+        """Pickle the state of the incremental model."""
+        with open(filename, 'wb') as f:
+            pickle.dump(self, f)
+
+    @staticmethod
+    def load(filename):
+        """Load the state of an incremental model pickled with `save`."""
+        with open(filename, 'rb') as f:
+            return pickle.load(f)
+
+
+def run_incremental_update(filename, state_file, full_data=None, chunksize=None):
+    """Update the incremental model saved in `state_file` with new passengers.
+
+    Parameters
+    ----------
+    filename: str
+        Path to the file of the new passengers
+    state_file: str
+        Path of the pickled `IncrementalModel`, created if missing
+    full_data: str, optional
+        Path to the file of all the passengers, to report the drift of the
+        incremental model from a full refit
+    chunksize: int, optional
+        Stream the new passengers in chunks of this number of rows
+
+    Returns
+    -------
+    dict or None
+        Drift of the incremental model, when `full_data` is given
+    """
+
+    try:
+        model = IncrementalModel.load(state_file)
+        logging.info('Loaded the incremental model trained on {} passengers'.format(model.n_samples))
+    except FileNotFoundError:
+        logging.info('Creating a new incremental model in {}'.format(state_file))
+        model = IncrementalModel()
+
+    if chunksize is None:
+        model.partial_fit(pipelines.read_raw_data(filename))
+    else:
+        for chunk in pipelines.read_raw_chunks(filename, chunksize):
+            model.partial_fit(chunk)
+
+    model.save(state_file)
+
+    if full_data is None:
+        return None
+
+    drift = model.drift(pipelines.read_raw_data(full_data))
+    logging.info('Drift from a full refit: {}'.format(
+        ', '.join('{} {:.4f}'.format(key, value) for key, value in drift.items())))
+    return drift
@@ -1,10 +1,18 @@
+import json
 import logging
+import numpy as np
 import pandas as pd
+from sklearn.base import BaseEstimator, ClassifierMixin
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score
+from sklearn.utils.validation import check_is_fitted
+from titanic import evaluation, parallel, profiling, scoring
+from titanic.config import SEARCH_METHODS, SIMPLIFY_TITLE, TITLE_PATTERN
 
+NUMERICAL_FEATURES = ['Age']
+CATEGORICAL_FEATURES = ['Sex', 'Title']
 
-def data_preparation(df, test_size, random_state=None):
+
+def data_preparation(df, test_size, random_state=None, vocabulary=None):
     """Permute and split DataFrame index into train and test.
 
     Parameters
@@ -13,6 +21,9 @@ def data_preparation(df, test_size, random_state=None):
     test_size: float
         Fraction between 0.0 and 1.0
     random_state: int
+    vocabulary: dict, optional
+        Category vocabulary to encode the dummies with, see
+        `category_vocabulary`
 
     Returns
     -------
@@ -22,39 +33,299 @@ def data_preparation(df, test_size, random_state=None):
 
     logging.info("Splitting the data-frame into train and test parts")
 
-    df = df[['Age', 'Sex', 'Title', 'Survived']]
+    with profiling.stage('get_dummies', rows=len(df)):
+        if vocabulary is None:
+            df = df[['Age', 'Sex', 'Title', 'Survived']]
+            df = pd.get_dummies(df, columns=['Sex', 'Title'])
+            X = df.drop('Survived', axis=1).values
+        else:
+            X, _ = design_matrix(df, vocabulary=vocabulary)
+
+    with profiling.stage('split', rows=len(df)):
+        X_train, X_test, y_train, y_test = train_test_split(
+            X,
+            df['Survived'].values,
+            test_size=test_size,
+            random_state=random_state
+        )
+
+    return X_train, X_test, y_train, y_test
+
+
+def category_vocabulary(df, columns=CATEGORICAL_FEATURES):
+    """Categories of the categorical features, in the order of the dummies.
+
+    Encoding the train and the scoring data with the same vocabulary yields
+    the same columns, whatever the categories present in each data-frame.
+
+    Parameters
+    ----------
+    df: pandas.DataFrame
+    columns: list of str
+        Categorical columns to encode
+
+    Returns
+    -------
+    dict
+        Lists of categories by column
+    """
+
+    return {column: list(df[column].astype('category').cat.categories)
+            for column in columns}
+
+
+def save_vocabulary(vocabulary, filename):
+    """Save a category vocabulary to a JSON file."""
+    with open(filename, 'w') as f:
+        json.dump(vocabulary, f, indent=2)
+
+
+def load_vocabulary(filename):
+    """Load a category vocabulary from a JSON file."""
+    with open(filename) as f:
+        return json.load(f)
+
+
+def feature_names(vocabulary):
+    """Names of the columns of the design matrix, as in `pd.get_dummies`."""
+    return NUMERICAL_FEATURES + [
+        '{}_{}'.format(column, category)
+        for column, categories in vocabulary.items()
+        for category in categories
+    ]
+
+
+def _dummy_columns(df, vocabulary):
+    """Column of the dummy of each row for each categorical feature.
+
+    The codes of the categories not in the vocabulary are -1, so that, as in
+    `pd.get_dummies`, they have no dummy set.
+    """
+
+    offset = len(NUMERICAL_FEATURES)
+    for column, categories in vocabulary.items():
+        codes = pd.Categorical(df[column], categories=categories).codes
+        yield np.where(codes >= 0, offset + codes, -1)
+        offset += len(categories)
+
+
+@profiling.profiled('design_matrix')
+def design_matrix(df, filename=None, dtype='float32', vocabulary=None):
+    """One-hot encode the features into a single compact matrix.
 
-    df = pd.get_dummies(df, columns=['Sex', 'Title'])
+    The matrix has the same columns as the one of `data_preparation`, but it is
+    filled in place from the categorical codes, without the intermediate
+    copies of `pd.get_dummies`. The dummies, being 0 or 1, are exact in
+    `float32`, which halves the memory of the default `float64`.
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        df.drop('Survived', axis=1).values,
-        df['Survived'].values,
-        test_size=test_size,
-        random_state=random_state
-    )
+    With `filename`, the matrix is backed by a `.npy` file, which other
+    processes can share with `numpy.load(filename, mmap_mode='r')`.
+
+    Parameters
+    ----------
+    df: pandas.DataFrame
+        Data-frame with the columns `Age`, `Sex` and `Title`
+    filename: str, optional
+        Path of the `.npy` file backing the matrix
+    dtype: str
+        Data type of the matrix
+    vocabulary: dict, optional
+        Category vocabulary, by default the one of `df`
+
+    Returns
+    -------
+    tuple of numpy.ndarray and list of str
+        Design matrix and names of its columns
+    """
+
+    logging.info("Building the design matrix")
+
+    if vocabulary is None:
+        vocabulary = category_vocabulary(df)
+
+    columns = feature_names(vocabulary)
+    shape = (len(df), len(columns))
+
+    if filename is None:
+        X = np.zeros(shape, dtype=dtype)
+    else:
+        # A new .npy file is filled with zeros
+        X = np.lib.format.open_memmap(filename, mode='w+', dtype=dtype, shape=shape)
+
+    X[:, :len(NUMERICAL_FEATURES)] = df[NUMERICAL_FEATURES].values
+
+    rows = np.arange(len(df))
+    for dummy_columns in _dummy_columns(df, vocabulary):
+        known = dummy_columns >= 0
+        X[rows[known], dummy_columns[known]] = 1
+
+    if filename is not None:
+        X.flush()
+
+    return X, columns
+
+
+@profiling.profiled('sparse_design_matrix')
+def sparse_design_matrix(df, dtype='float32', vocabulary=None):
+    """One-hot encode the features into a sparse CSR matrix.
+
+    The memory grows with the number of non-zero values instead of with the
+    number of dummies, which keeps high-cardinality categorical features cheap.
+
+    Parameters
+    ----------
+    df: pandas.DataFrame
+        Data-frame with the column `Age` and the columns of the vocabulary
+    dtype: str
+        Data type of the matrix
+    vocabulary: dict, optional
+        Category vocabulary, by default the one of `df` for `Sex` and `Title`
+
+    Returns
+    -------
+    tuple of scipy.sparse.csr_matrix and list of str
+        Design matrix and names of its columns
+    """
+
+    from scipy import sparse
+
+    logging.info("Building the sparse design matrix")
+
+    if vocabulary is None:
+        vocabulary = category_vocabulary(df)
+
+    columns = feature_names(vocabulary)
+    n_rows = len(df)
+
+    # One block of entries per row, in column order, as required by CSR
+    entries = [np.arange(len(NUMERICAL_FEATURES))[np.newaxis, :].repeat(n_rows, axis=0)]
+    entries += [dummy_columns[:, np.newaxis] for dummy_columns in _dummy_columns(df, vocabulary)]
+    indices = np.hstack(entries)
+    values = np.hstack([df[NUMERICAL_FEATURES].values.astype(dtype),
+                        np.ones((n_rows, len(vocabulary)), dtype=dtype)])
+
+    keep = (indices >= 0) & (values != 0)
+    indptr = np.concatenate([[0], np.cumsum(keep.sum(axis=1))])
+    X = sparse.csr_matrix((values[keep], indices[keep], indptr),
+                          shape=(n_rows, len(columns)))
+
+    return X, columns
+
+
+def sparse_data_preparation(df, test_size, random_state=None, vocabulary=None):
+    """Permute and split the sparse design matrix into train and test.
+
+    Parameters
+    ----------
+    df: pandas.DataFrame
+    test_size: float
+        Fraction between 0.0 and 1.0
+    random_state: int
+    vocabulary: dict, optional
+        Category vocabulary, by default the one of `df`
+
+    Returns
+    -------
+    tuple of scipy.sparse.csr_matrix and numpy.ndarray,
+        X_train, X_test, y_train, y_test
+    """
+
+    logging.info("Splitting the sparse design matrix into train and test parts")
+
+    X, _ = sparse_design_matrix(df, vocabulary=vocabulary)
+
+    with profiling.stage('split', rows=len(df)):
+        X_train, X_test, y_train, y_test = train_test_split(
+            X,
+            df['Survived'].values,
+            test_size=test_size,
+            random_state=random_state
+        )
 
     return X_train, X_test, y_train, y_test
 
 
-class MajorityVoteClassifier:
+def split_indices(n_samples, test_size, random_state=None):
+    """Permute and split the row indices into train and test.
+
+    The split is the same as the one of `data_preparation` with the same
+    `random_state`, but the rows are selected by index instead of copied.
+
+    Parameters
+    ----------
+    n_samples: int
+    test_size: float
+        Fraction between 0.0 and 1.0
+    random_state: int
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        train_index, test_index
+    """
+
+    return train_test_split(np.arange(n_samples),
+                            test_size=test_size,
+                            random_state=random_state)
+
+
+class MajorityVoteClassifier(ClassifierMixin, BaseEstimator):
     """Majority Vote Classifier
 
-    This class contains the `fit` and `predict` methods that are compatible
-    with the SciKit-Learn model classes.
+    This class follows the SciKit-Learn estimator API, so that it can be
+    cloned, pickled and used in the model selection tools like any other
+    classifier. The predictions are filled in a single array allocation.
+
+    With `partial_fit`, the class counts are updated with new batches of
+    samples, without the samples seen before.
     """
-    def __init__(self):
-        self.majority_vote = None
 
     def fit(self, X, y):
-        self.majority_vote = round(y.mean())
+        for attribute in ['classes_', 'class_count_']:
+            self.__dict__.pop(attribute, None)
+        return self.partial_fit(X, y)
+
+    def partial_fit(self, X, y, classes=None):
+        batch_classes, batch_counts = np.unique(y, return_counts=True)
+
+        if not hasattr(self, 'classes_'):
+            self.classes_ = batch_classes if classes is None else np.union1d(classes, batch_classes)
+            self.class_count_ = np.zeros(len(self.classes_), dtype=np.int64)
+        elif not np.isin(batch_classes, self.classes_).all():
+            # Classes not seen before are added to the counts
+            classes = np.union1d(self.classes_, batch_classes)
+            class_count = np.zeros(len(classes), dtype=np.int64)
+            class_count[np.searchsorted(classes, self.classes_)] = self.class_count_
+            self.classes_, self.class_count_ = classes, class_count
+
+        self.class_count_[np.searchsorted(self.classes_, batch_classes)] += batch_counts
+        self.class_prior_ = self.class_count_ / self.class_count_.sum()
+        # On a tie, the first class wins
+        self.majority_vote_ = self.classes_[np.argmax(self.class_count_)]
+        self.n_features_in_ = X.shape[1]
         return self
 
     def predict(self, X):
-        if self.majority_vote is None:
-            raise ValueError("The majority vote classifier has to be trained before making predictions")
-        return [self.majority_vote] * len(X)
+        check_is_fitted(self, 'majority_vote_')
+        return np.full(X.shape[0], self.majority_vote_, dtype=self.classes_.dtype)
+
+    def predict_proba(self, X):
+        check_is_fitted(self, 'class_prior_')
+        return np.tile(self.class_prior_, (X.shape[0], 1))
+
 
+def cache_evaluation(model, X_test, y_test):
+    """Predict the test set once and cache the predictions and metrics on the model.
 
+    The predicted classes are stored as `test_predictions_` and the report of
+    `evaluation.evaluate` as `evaluation_`, so that they are not computed
+    again, and are stored with the model in the pipeline cache.
+    """
+    model.evaluation_, model.test_predictions_ = evaluation.evaluate(model, X_test, y_test)
+    return model
+
+
+@profiling.profiled('majority_vote')
 def run_majority_vote(X_train, X_test, y_train, y_test):
     """Use the majority vote to predict survival.
 
@@ -71,19 +342,26 @@ def run_majority_vote(X_train, X_test, y_train, y_test):
 
     majority_vote_classifier = MajorityVoteClassifier()
     majority_vote_classifier.fit(X_train, y_train)
-    y_test_predictions = majority_vote_classifier.predict(X_test)
-
-    accuracy = accuracy_score(y_true=y_test, y_pred=y_test_predictions)
 
-    logging.info('The prediction accuracy with the majority vote classifier is {:.1f}%'.format(accuracy * 100))
+    cache_evaluation(majority_vote_classifier, X_test, y_test)
+    evaluation.log_report('majority vote classifier', majority_vote_classifier.evaluation_)
 
     return majority_vote_classifier
 
 
-def run_logistic_regression(X_train, X_test, y_train, y_test):
+def run_logistic_regression(X_train, X_test, y_train, y_test, search='grid', n_jobs=None):
     """Use ridge logistic regression to predict survival.
 
-    The ridge parameter is found using 10-fold cross-validation.
+    The ridge parameter is found using 10-fold cross-validation, with one of
+    the `SEARCH_METHODS`:
+
+    - ``'grid'``: grid search with an independent fit for each parameter;
+    - ``'path'``: regularization path, where the fits of each fold go through
+      the sorted parameters starting from the previous coefficients, and the
+      folds run in parallel;
+    - ``'halving'``: successive halving, where the parameters are first
+      evaluated on a subset of the samples and only the best ones survive to
+      the evaluations on more samples.
 
     Parameters
     ----------
@@ -91,30 +369,109 @@ def run_logistic_regression(X_train, X_test, y_train, y_test):
     X_test: numpy.ndarray
     y_train: numpy.ndarray
     y_test: numpy.ndarray
+    search: str
+        Search method of the ridge parameter
+    n_jobs: int, optional
+        Number of parallel jobs, -1 to use all the processors, by default that
+        of `parallel.settings`, which also sets the joblib backend and the
+        BLAS threads of the search
 
     """
 
     logging.info("Running the ridge logistic regression classifier")
 
-    from sklearn.linear_model import LogisticRegression
+    from sklearn.linear_model import LogisticRegression, LogisticRegressionCV
     from sklearn.model_selection import GridSearchCV
 
-    lr = LogisticRegression(random_state=0, solver='lbfgs')
-
     param_range = [2 ** x for x in range(-10, 10)]
+    n_jobs = parallel.settings(n_jobs=n_jobs)['n_jobs']
+
+    if search == 'grid':
+        model = GridSearchCV(
+            estimator=LogisticRegression(random_state=0, solver='lbfgs'),
+            param_grid={'C': param_range},
+            scoring='accuracy',
+            cv=10,
+            n_jobs=n_jobs
+        )
+    elif search == 'path':
+        model = LogisticRegressionCV(
+            Cs=param_range,
+            scoring='accuracy',
+            cv=10,
+            solver='lbfgs',
+            random_state=0,
+            n_jobs=n_jobs
+        )
+    elif search == 'halving':
+        from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+        from sklearn.model_selection import HalvingGridSearchCV
+        model = HalvingGridSearchCV(
+            estimator=LogisticRegression(random_state=0, solver='lbfgs'),
+            param_grid={'C': param_range},
+            scoring='accuracy',
+            cv=10,
+            random_state=0,
+            n_jobs=n_jobs
+        )
+    else:
+        raise ValueError("The search method has to be one of {}".format(', '.join(SEARCH_METHODS)))
+
+    with profiling.stage('logistic_regression_{}'.format(search), rows=X_train.shape[0]), \
+            parallel.limits(n_jobs=n_jobs):
+        model.fit(X_train, y_train)
+
+    cache_evaluation(model, X_test, y_test)
+    evaluation.log_report('ridge logistic regression classifier', model.evaluation_)
+
+    return model
+
+
+def export_scorer(model, vocabulary, fill_values, dtype='float32', metadata=None, unknown_title='raise'):
+    """Self-contained scorer of a fitted logistic regression.
+
+    The scorer is a model artifact of `titanic.scoring`: the coefficient
+    vector, the intercept, the column of each feature of the dummy layout of
+    `data_preparation` and the encoding of the raw passengers. It scores raw
+    passenger records with `scoring.score_records`, without scikit-learn and
+    its validation of the inputs, and its decisions are the same to the bit
+    as those of the model on the design matrix of the same records.
 
-    gs = GridSearchCV(
-        estimator=lr,
-        param_grid={'C': param_range},
-        scoring='accuracy',
-        cv=10,
-        n_jobs=-1
-    )
-
-    gs.fit(X_train, y_train)
-
-    accuracy = accuracy_score(y_true=y_test, y_pred=gs.predict(X_test))
+    Parameters
+    ----------
+    model: sklearn.base.BaseEstimator
+        Fitted `LogisticRegression`, or a search whose best estimator is one
+    vocabulary: dict
+        Category vocabulary of the design matrix of the model
+    fill_values: dict
+        Values of the missing numerical features by column
+    dtype: str
+        Type of the design matrix the model was trained on
+    metadata: dict, optional
+        Additional information stored in the artifact
+    unknown_title: str
+        Policy for the unknown titles the model was trained with
 
-    logging.info('The prediction accuracy with the ridge logistic regression classifier is {:.1f}%'.format(accuracy * 100))
+    Returns
+    -------
+    dict
+        Compiled artifact, see `scoring.compile_artifact`; the result of
+        `scoring.make_artifact` before compilation is stored with
+        `scoring.save_artifact`
+    """
 
-    return gs
+    estimator = getattr(model, 'best_estimator_', model)
+
+    return scoring.compile_artifact(scoring.make_artifact(
+        coef=estimator.coef_[0],
+        intercept=estimator.intercept_[0],
+        classes=estimator.classes_,
+        features=feature_names(vocabulary),
+        vocabulary=vocabulary,
+        fill_values=fill_values,
+        simplify_title=SIMPLIFY_TITLE,
+        title_pattern=TITLE_PATTERN,
+        metadata=metadata,
+        dtype=dtype,
+        unknown_title=unknown_title,
+    ))
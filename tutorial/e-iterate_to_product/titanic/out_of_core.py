@@ -0,0 +1,203 @@
+"""Training on data larger than memory, streamed from disk in chunks.
+
+The file is read once to collect the counts of the ages and the category
+vocabulary, then once per epoch to train a mini-batch logistic regression, and
+once more to evaluate it. The rows are assigned to the train or test set by a
+hash of the passenger name, so that the split needs no global shuffle and is
+the same in every pass, and the metrics are accumulated chunk by chunk. Only
+one chunk is held in memory at a time.
+"""
+import logging
+import numpy as np
+import pandas as pd
+from titanic import data, pipelines
+from titanic.evaluation import Evaluation
+from titanic.incremental import IncrementalModel
+
+
+def hash_split(names, test_size, random_state=0):
+    """Deterministic assignment of rows to the test set.
+
+    Parameters
+    ----------
+    names: pandas.Series
+        Names of the passengers, hashed with a key derived from `random_state`
+    test_size: float
+        Expected fraction of the rows in the test set
+    random_state: int
+
+    Returns
+    -------
+    numpy.ndarray
+        Boolean mask of the test rows
+    """
+
+    hashes = pd.util.hash_pandas_object(names, index=False,
+                                        hash_key='{:016d}'.format(random_state))
+    return hashes.values < np.uint64(test_size * 2 ** 64)
+
+
+def processed_chunks(filename, chunksize, age_median, unknown_title='raise'):
+    """Processed chunks of a file, without the passengers of unknown title."""
+    for chunk in pipelines.read_raw_chunks(filename, chunksize):
+        processed = pipelines.process_data(chunk, age_median, unknown_title=unknown_title)
+        if unknown_title == 'quarantine':
+            processed, quarantined = data.quarantine_unknown_titles(processed)
+            if len(quarantined):
+                logging.info('Left out {} passengers with unknown titles'.format(len(quarantined)))
+        yield processed
+
+
+def scan_data(filename, chunksize, unknown_title='raise'):
+    """Counts of the ages and category vocabulary of a file read in chunks.
+
+    Parameters
+    ----------
+    filename: str
+        Path to the CSV, Parquet or Feather file
+    chunksize: int
+        Number of rows per chunk
+    unknown_title: str
+        Policy for the titles missing from `data.SIMPLIFY_TITLE`
+
+    Returns
+    -------
+    tuple
+        Counts of the distinct ages, number of missing ages and lists of
+        categories by categorical column
+    """
+
+    from titanic import models
+
+    age_counts = pd.Series(dtype='int64')
+    n_missing = 0
+    categories = {column: set() for column in models.CATEGORICAL_FEATURES}
+
+    for chunk in processed_chunks(filename, chunksize, np.nan, unknown_title=unknown_title):
+        age_counts = age_counts.add(chunk['Age'].value_counts(), fill_value=0)
+        n_missing += int(chunk['Age'].isna().sum())
+        for column, values in categories.items():
+            values.update(chunk[column].cat.categories)
+
+    vocabulary = {column: sorted(values) for column, values in categories.items()}
+
+    return age_counts, n_missing, vocabulary
+
+
+def train_out_of_core(filename, chunksize, test_size=0.2, random_state=0, alpha=1e-3,
+                      n_epochs=5, unknown_title='raise'):
+    """Train the majority vote and a mini-batch logistic regression in chunks.
+
+    Each epoch streams the whole file and updates the logistic regression with
+    the shuffled training rows of every chunk. The results are the same for
+    the same file, `chunksize` and `random_state`.
+
+    Parameters
+    ----------
+    filename: str
+        Path to the CSV, Parquet or Feather file
+    chunksize: int
+        Number of rows per chunk
+    test_size: float
+        Expected fraction of the passengers in the test set
+    random_state: int
+        Seed of the split, of the shuffles and of the logistic regression
+    alpha: float
+        Strength of the ridge penalty of the logistic regression
+    n_epochs: int
+        Passes over the training rows
+    unknown_title: str
+        Policy for the titles missing from `data.SIMPLIFY_TITLE`
+
+    Returns
+    -------
+    tuple
+        The trained `IncrementalModel` and the metrics on the test set
+    """
+
+    logging.info('Training out of core in chunks of {} rows'.format(chunksize))
+
+    age_counts, n_missing, vocabulary = scan_data(filename, chunksize, unknown_title=unknown_title)
+
+    model = IncrementalModel(alpha=alpha, n_epochs=1, random_state=random_state)
+    model.vocabulary = vocabulary
+    model.age_counts = age_counts
+    age_median = model.age_median
+
+    # The missing ages are filled with the median before scaling
+    filled_counts = age_counts.add(pd.Series({age_median: n_missing}), fill_value=0)
+    mean = np.average(filled_counts.index, weights=filled_counts.values)
+    std = np.sqrt(np.average((filled_counts.index - mean) ** 2, weights=filled_counts.values))
+    model.age_scale = (float(mean), float(std) or 1.0)
+
+    rng = np.random.RandomState(random_state)
+    for epoch in range(n_epochs):
+        n_train = 0
+        for chunk in processed_chunks(filename, chunksize, age_median, unknown_title=unknown_title):
+            train = chunk[~hash_split(chunk['Name'], test_size, random_state)]
+            if not len(train):
+                continue
+            X = model.features(train)
+            y = train['Survived'].values
+            if epoch == 0:
+                model.majority_vote.partial_fit(X, y)
+            order = rng.permutation(len(y))
+            model.logistic_regression.partial_fit(X[order], y[order], classes=[0, 1])
+            n_train += len(y)
+        logging.info('Finished epoch {} of {} over {} passengers'.format(epoch + 1, n_epochs, n_train))
+    model.n_samples = n_train
+
+    metrics = evaluate_out_of_core(model, filename, chunksize, test_size=test_size,
+                                   random_state=random_state, unknown_title=unknown_title)
+    metrics['n_train'] = n_train
+
+    logging.info('Out of core accuracy: {accuracy:.4f}, log-loss: {log_loss:.4f}, '
+                 'majority vote accuracy: {majority_vote_accuracy:.4f}'.format(**metrics))
+
+    return model, metrics
+
+
+def evaluate_out_of_core(model, filename, chunksize, test_size=0.2, random_state=0,
+                         unknown_title='raise'):
+    """Metrics of a model on the test rows, accumulated over the chunks.
+
+    Parameters
+    ----------
+    model: IncrementalModel
+    filename: str
+        Path to the CSV, Parquet or Feather file
+    chunksize: int
+        Number of rows per chunk
+    test_size: float
+        Expected fraction of the passengers in the test set
+    random_state: int
+        Seed of the split
+    unknown_title: str
+        Policy for the titles missing from `data.SIMPLIFY_TITLE`
+
+    Returns
+    -------
+    dict
+        Metrics of `evaluation.Evaluation` of the logistic regression,
+        accuracy of the majority vote and number of test passengers
+    """
+
+    logistic_regression = Evaluation()
+    majority_vote_correct = 0
+
+    for chunk in processed_chunks(filename, chunksize, model.age_median, unknown_title=unknown_title):
+        test = chunk[hash_split(chunk['Name'], test_size, random_state)]
+        if not len(test):
+            continue
+        X = model.features(test)
+        y = test['Survived'].values
+
+        logistic_regression.update(y, model.logistic_regression.predict_proba(X)[:, 1],
+                                   model.logistic_regression.predict(X))
+        majority_vote_correct += np.count_nonzero(model.majority_vote.predict(X) == y)
+
+    metrics = logistic_regression.report()
+    metrics['n_test'] = metrics.pop('n_samples')
+    metrics['majority_vote_accuracy'] = float(majority_vote_correct / metrics['n_test'])
+
+    return metrics
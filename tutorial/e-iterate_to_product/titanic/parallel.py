@@ -0,0 +1,141 @@
+"""Parallelism settings of the model searches.
+
+The searches run their fits over a pool of joblib workers, and each worker
+may itself run multithreaded BLAS. On large shared hosts, a worker per core
+with a BLAS thread per core oversubscribes the machine, so the number of
+workers is capped by the processors available to the process, and the BLAS
+threads of each worker default to the processors left per worker.
+
+The settings are taken, in order of precedence, from `configure`, from the
+environment variables
+
+    TITANIC_N_JOBS, TITANIC_BACKEND, TITANIC_BLAS_THREADS, TITANIC_MAX_NBYTES
+
+and from the defaults. The arrays larger than `max_nbytes`, such as `X_train`,
+are memory-mapped and shared read-only with the worker processes instead of
+being copied to each of them; a `max_nbytes` of ``'none'`` copies them.
+
+This module loads joblib and threadpoolctl only when a search runs.
+"""
+import os
+from contextlib import contextmanager
+from titanic.config import JOBLIB_BACKENDS
+
+ENVIRONMENT = {'n_jobs': 'TITANIC_N_JOBS',
+               'backend': 'TITANIC_BACKEND',
+               'blas_threads': 'TITANIC_BLAS_THREADS',
+               'max_nbytes': 'TITANIC_MAX_NBYTES'}
+
+_overrides = {}
+
+
+def configure(n_jobs=None, backend=None, blas_threads=None, max_nbytes=None):
+    """Set the parallelism of the process, the None values are left unset."""
+    for key, value in [('n_jobs', n_jobs), ('backend', backend),
+                       ('blas_threads', blas_threads), ('max_nbytes', max_nbytes)]:
+        if value is not None:
+            _overrides[key] = value
+
+
+def reset():
+    """Forget the settings of `configure`."""
+    _overrides.clear()
+
+
+def available_cpus():
+    """Number of processors the process may run on, which honours CPU pinning."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on macOS and Windows
+        return os.cpu_count() or 1
+
+
+def settings(**kwargs):
+    """Resolved parallelism settings.
+
+    Parameters
+    ----------
+    kwargs
+        Settings taking precedence over `configure` and the environment, the
+        None values are ignored
+
+    Returns
+    -------
+    dict
+        Number of workers `n_jobs`, joblib `backend`, number of BLAS threads
+        per worker `blas_threads` and memory-mapping threshold `max_nbytes`
+    """
+
+    resolved = {}
+    for key, variable in ENVIRONMENT.items():
+        value = kwargs.get(key)
+        if value is None:
+            value = _overrides.get(key, os.environ.get(variable))
+        resolved[key] = value
+
+    cpus = available_cpus()
+
+    n_jobs = int(resolved['n_jobs']) if resolved['n_jobs'] is not None else cpus
+    if n_jobs <= 0:
+        # As in joblib, -1 is all the processors, -2 all but one, and so on
+        n_jobs = cpus + 1 + n_jobs
+    resolved['n_jobs'] = max(1, min(n_jobs, cpus))
+
+    resolved['backend'] = resolved['backend'] or 'loky'
+    if resolved['backend'] not in JOBLIB_BACKENDS:
+        raise ValueError("The joblib backend has to be one of {}".format(', '.join(JOBLIB_BACKENDS)))
+
+    if resolved['blas_threads'] is None:
+        resolved['blas_threads'] = max(1, cpus // resolved['n_jobs'])
+    resolved['blas_threads'] = int(resolved['blas_threads'])
+
+    max_nbytes = resolved['max_nbytes']
+    if max_nbytes is None:
+        resolved['max_nbytes'] = '1M'
+    elif str(max_nbytes).lower() == 'none':
+        # No memory-mapping, the arrays are copied to every worker
+        resolved['max_nbytes'] = None
+    elif str(max_nbytes).isdigit():
+        resolved['max_nbytes'] = int(max_nbytes)
+
+    return resolved
+
+
+@contextmanager
+def limits(**kwargs):
+    """Run the enclosed block with the parallelism settings.
+
+    The joblib calls of the block, such as those of the scikit-learn
+    searches, use the backend and the memory-mapping of the settings, and the
+    BLAS libraries are limited to `blas_threads` threads in the main process
+    and in every worker.
+
+    Parameters
+    ----------
+    kwargs
+        Settings taking precedence, see `settings`
+
+    Yields
+    ------
+    dict
+        The resolved settings
+    """
+
+    import joblib
+    from threadpoolctl import threadpool_limits
+
+    resolved = settings(**kwargs)
+
+    backend_params = {}
+    # Only loky sets the thread limits of its workers, the forked workers of
+    # multiprocessing inherit those of the main process
+    if resolved['backend'] == 'loky':
+        backend_params['inner_max_num_threads'] = resolved['blas_threads']
+
+    with threadpool_limits(limits=resolved['blas_threads'], user_api='blas'), \
+            joblib.parallel_config(backend=resolved['backend'],
+                                   n_jobs=resolved['n_jobs'],
+                                   max_nbytes=resolved['max_nbytes'],
+                                   mmap_mode='r',
+                                   **backend_params):
+        yield resolved
@@ -1,36 +1,845 @@
+import os
+import json
+import hashlib
+import inspect
 import logging
+import importlib.util
+import numpy as np
 import pandas as pd
-from titanic import data, models
+from pandas.api.types import union_categoricals
+from titanic import config, data, profiling, scoring, validation
 
+# The modelling module loads scikit-learn, which takes most of the import
+# time, so it is imported only by the functions that train models.
 
-def run_titanic_analysis(filename):
+# Schema of the passenger data, passed to the readers so that the columns are
+# parsed straight into compact types. The names are stored as Arrow strings
+# when pyarrow is installed.
+DTYPES = {'Name': 'string[pyarrow]' if importlib.util.find_spec('pyarrow') else 'object',
+          'Sex': 'category',
+          'Age': 'float32',
+          'Survived': 'int8'}
+
+COLUMNS = list(DTYPES)
+
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+FEATHER_EXTENSIONS = ('.feather', '.arrow')
+
+
+def read_raw_data(filename, columns=COLUMNS, dtypes=DTYPES):
+    """Read the columns of a CSV, Parquet or Feather file.
+
+    The format is inferred from the file extension. The columnar formats read
+    only the requested columns from disk.
+
+    Parameters
+    ----------
+    filename: str
+        Path to the input data
+    columns: list of str
+        Columns to read
+    dtypes: dict
+        Types of the CSV columns by name
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
+
+    extension = os.path.splitext(filename)[1].lower()
+    dtypes = {column: dtypes[column] for column in columns}
+
+    with profiling.stage('read') as record:
+        if extension in PARQUET_EXTENSIONS:
+            df = pd.read_parquet(filename, columns=columns)
+        elif extension in FEATHER_EXTENSIONS:
+            df = pd.read_feather(filename, columns=columns)
+        else:
+            df = pd.read_csv(filename, usecols=columns, dtype=dtypes)
+        record['rows'] = len(df)
+
+    return df
+
+
+def read_raw_chunks(filename, chunksize, columns=COLUMNS, dtypes=DTYPES):
+    """Iterate over the chunks of a CSV, Parquet or Feather file.
+
+    Parameters
+    ----------
+    filename: str
+        Path to the input data
+    chunksize: int
+        Number of rows per chunk
+    columns: list of str
+        Columns to read
+    dtypes: dict
+        Types of the CSV columns by name
+
+    Yields
+    ------
+    pandas.DataFrame
+    """
+
+    extension = os.path.splitext(filename)[1].lower()
+    dtypes = {column: dtypes[column] for column in columns}
+
+    if extension in PARQUET_EXTENSIONS:
+        import pyarrow.parquet as pq
+        batches = pq.ParquetFile(filename).iter_batches(batch_size=chunksize,
+                                                        columns=columns)
+    elif extension in FEATHER_EXTENSIONS:
+        batches = feather_batches(filename, chunksize, columns)
+    else:
+        yield from pd.read_csv(filename, usecols=columns, chunksize=chunksize, dtype=dtypes)
+        return
+
+    start = 0
+    for batch in batches:
+        chunk = batch.to_pandas()
+        # Continuous index across the chunks, as with `pd.read_csv`
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        start += len(chunk)
+        yield chunk
+
+
+def feather_batches(filename, chunksize, columns):
+    """Iterate over the rows of a Feather file in tables of `chunksize` rows.
+
+    The record batches of the file are read, and decompressed, one at a time,
+    so that the memory is bounded by a record batch and a chunk rather than
+    by the whole columns.
+    """
+
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    reader = ipc.open_file(pa.memory_map(filename))
+    pending, n_pending = [], 0
+    for i in range(reader.num_record_batches):
+        batch = reader.get_batch(i).select(columns)
+        pending.append(batch)
+        n_pending += batch.num_rows
+        while n_pending >= chunksize:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, chunksize)
+            rest = table.slice(chunksize)
+            pending, n_pending = rest.to_batches(), rest.num_rows
+    if n_pending:
+        yield pa.Table.from_batches(pending)
+
+
+def file_columns(filename):
+    """Names of the columns of a CSV, Parquet or Feather file, read from its header."""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in PARQUET_EXTENSIONS:
+        import pyarrow.parquet as pq
+        return pq.read_schema(filename).names
+    if extension in FEATHER_EXTENSIONS:
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+        return ipc.open_file(pa.memory_map(filename)).schema.names
+    return list(pd.read_csv(filename, nrows=0).columns)
+
+
+def validated_chunks(filename, chunksize=None, rejects_file=None, max_reject_rate=0.05):
+    """Iterate over the valid rows of a file, see `titanic.validation`.
+
+    The columns are checked from the header before any row is read, and the
+    rows are validated chunk by chunk, so that a bad file fails with the
+    first chunk that brings the rejected rows above `max_reject_rate`, once
+    `validation.MIN_CHECKED_ROWS` rows are validated.
+
+    Parameters
+    ----------
+    filename: str
+        Path to the CSV, Parquet or Feather input data
+    chunksize: int, optional
+        Number of rows per chunk, if None the whole file is one chunk
+    rejects_file: str, optional
+        CSV sidecar file of the rejected rows, created only if rows are
+        rejected, not written if None
+    max_reject_rate: float
+        Tolerated fraction of rejected rows
+
+    Yields
+    ------
+    pandas.DataFrame
+        Valid rows, with the types of `DTYPES` but for the numbers in float64
+    """
+
+    validation.check_columns(file_columns(filename))
+
+    # The numbers are read as text, so that the invalid values are rejected
+    # rather than failing the parsing
+    dtypes = dict(DTYPES, Age=str, Survived=str)
+    if chunksize is None:
+        chunks = [read_raw_data(filename, dtypes=dtypes)]
+    else:
+        chunks = read_raw_chunks(filename, chunksize, dtypes=dtypes)
+
+    summary = None
+    for chunk in chunks:
+        with profiling.stage('validate', rows=len(chunk)):
+            valid, rejects, chunk_summary = validation.validate(chunk)
+        summary = chunk_summary if summary is None else validation.merge_summaries(summary, chunk_summary)
+        if summary['rows'] >= validation.MIN_CHECKED_ROWS:
+            validation.check_quality(summary, max_reject_rate)
+
+        if rejects_file is not None and len(rejects):
+            # Appended after the first rejects written by this call
+            validation.write_rejects(rejects, rejects_file, append=summary['rejected'] > len(rejects))
+        yield valid
+
+    if summary is None:
+        return
+    validation.check_quality(summary, max_reject_rate)
+    validation.log_summary(summary)
+    if rejects_file is not None and summary['rejected']:
+        logging.warning('Stored {} rejected rows in {}'.format(summary['rejected'], rejects_file))
+
+
+@profiling.profiled('fillna')
+def fill_missing_age(df, age_median):
+    """Fill the missing ages with the median age."""
+    return df.fillna({'Age': age_median, })
+
+
+@profiling.profiled('astype')
+def cast_dtypes(df):
+    """Cast the columns to the types of `DTYPES`.
+
+    The columns read from CSV already have these types and are not copied.
+    """
+    return df.astype(DTYPES, copy=False)
+
+
+def process_data(df, age_median, unknown_title='raise'):
+    """Fill the missing ages, cast the columns and extract the titles.
+
+    Parameters
+    ----------
+    df: pandas.DataFrame
+        Raw Titanic data with the columns `COLUMNS`
+    age_median: float
+        Median age used to fill the missing ages
+    unknown_title: str
+        Policy for the titles missing from `data.SIMPLIFY_TITLE`
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
+
+    return (
+        df
+        .pipe(fill_missing_age, age_median)
+        .pipe(cast_dtypes)
+        .pipe(data.extract_title, unknown_title=unknown_title)
+    )
+
+
+def streaming_median(filename, column, chunksize):
+    """Exact median of a numerical column read in chunks.
+
+    Only the counts of the distinct values are kept in memory, so the memory
+    is bounded by the number of distinct values and not by the file size.
+
+    Parameters
+    ----------
+    filename: str
+        Path to the CSV, Parquet or Feather file
+    column: str
+        Name of the column
+    chunksize: int
+        Number of rows per chunk
+
+    Returns
+    -------
+    float
+    """
+
+    counts = pd.Series(dtype='int64')
+    for chunk in read_raw_chunks(filename, chunksize, columns=[column]):
+        counts = counts.add(chunk[column].value_counts(), fill_value=0)
+
+    return median_from_counts(counts)
+
+
+def median_from_counts(counts):
+    """Exact median of values given as counts of the distinct values.
+
+    Parameters
+    ----------
+    counts: pandas.Series
+        Number of occurrences indexed by value
+
+    Returns
+    -------
+    float
+    """
+
+    if counts.empty:
+        return np.nan
+
+    counts = counts.sort_index()
+    cumulative = counts.values.cumsum()
+    total = cumulative[-1]
+    # Values at the two middle positions, which coincide for odd totals
+    lower = counts.index[np.searchsorted(cumulative, (total + 1) // 2)]
+    upper = counts.index[np.searchsorted(cumulative, total // 2 + 1)]
+
+    return (lower + upper) / 2
+
+
+def concat_chunks(chunks):
+    """Concatenate processed chunks keeping the categorical columns.
+
+    The chunks may not share the same categories, in which case `pd.concat`
+    would fall back to object columns, so the categories are unified.
+
+    Parameters
+    ----------
+    chunks: list of pandas.DataFrame
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
+
+    df = pd.concat(chunks, ignore_index=True)
+
+    for column, dtype in chunks[0].dtypes.items():
+        if dtype.name == 'category' and df[column].dtype.name != 'category':
+            df[column] = union_categoricals([chunk[column] for chunk in chunks],
+                                            sort_categories=True)
+
+    return df
+
+
+def read_titanic_data(filename, chunksize=None, unknown_title='raise', validate=False,
+                      rejects_file=None, max_reject_rate=0.05):
+    """Read and process the Titanic data.
+
+    With `chunksize`, the file is streamed twice: once to compute the median
+    age and once to process the chunks, so that the raw text and the
+    intermediate copies never exceed one chunk.
+
+    Parameters
+    ----------
+    filename: str
+        Path to the Titanic CSV, Parquet or Feather input data
+    chunksize: int, optional
+        Number of rows per chunk, if None the whole file is read at once
+    unknown_title: str
+        Policy for the titles missing from `data.SIMPLIFY_TITLE`
+    validate: bool
+        Whether to validate the rows right after reading and drop the
+        rejected ones, see `validated_chunks`
+    rejects_file: str, optional
+        CSV sidecar file of the rows rejected by the validation
+    max_reject_rate: float
+        Fraction of rejected rows above which the input is refused
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
+
+    if chunksize is None:
+        if validate:
+            df, = validated_chunks(filename, rejects_file=rejects_file, max_reject_rate=max_reject_rate)
+        else:
+            df = read_raw_data(filename)
+        return process_data(df, df.Age.median(), unknown_title=unknown_title)
+
+    logging.info('Reading the data in chunks of {} rows'.format(chunksize))
+
+    if validate:
+        # The rejected rows are written in the first pass and skipped in the second
+        counts = pd.Series(dtype='int64')
+        for chunk in validated_chunks(filename, chunksize, rejects_file=rejects_file,
+                                      max_reject_rate=max_reject_rate):
+            counts = counts.add(chunk['Age'].value_counts(), fill_value=0)
+        age_median = median_from_counts(counts)
+        raw_chunks = validated_chunks(filename, chunksize, max_reject_rate=max_reject_rate)
+    else:
+        age_median = streaming_median(filename, 'Age', chunksize)
+        raw_chunks = read_raw_chunks(filename, chunksize)
+
+    chunks = [
+        process_data(chunk, age_median, unknown_title=unknown_title)
+        for chunk in raw_chunks
+    ]
+
+    return concat_chunks(chunks)
+
+
+def file_hash(filename, block_size=2 ** 20):
+    """SHA-256 hex digest of the content of a file."""
+    sha = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def load_processed_data(filename, unknown_title='raise', chunksize=None, cache_dir=None):
+    """Read and process the Titanic data, through the cache if any.
+
+    The data is the output of the ``processed`` stage of `titanic_pipeline`,
+    cached with the outputs of the other stages. The passengers with unknown
+    titles are dropped with the policy ``'quarantine'``.
+
+    Parameters
+    ----------
+    filename: str
+        Path to the Titanic CSV, Parquet or Feather input data
+    unknown_title: str
+        Policy for the titles missing from `data.SIMPLIFY_TITLE`
+    chunksize: int, optional
+        Number of rows per chunk to stream the input file
+    cache_dir: str, optional
+        Folder of the cache of the processed data, if None no cache is used
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
+
+    pipeline = titanic_pipeline(filename,
+                                unknown_title=unknown_title,
+                                chunksize=chunksize,
+                                cache_dir=cache_dir)
+    processed_data = pipeline.run(['processed'])['processed']
+
+    if unknown_title == 'quarantine':
+        processed_data, quarantined_data = data.quarantine_unknown_titles(processed_data)
+        logging.warning('{} passengers with unknown titles were quarantined'.format(len(quarantined_data)))
+
+    return processed_data
+
+
+class Stage:
+    """Stage of a `Pipeline`.
+
+    The output of the stage is ``function(*outputs_of_inputs, **params)``. It
+    is identified by a key hashing the source code of the function and of the
+    callables in `code`, the parameters, the `fingerprint` and the keys of the
+    input stages, so that a stage re-runs only when one of them changes.
+
+    Parameters
+    ----------
+    name: str
+    function: callable
+    inputs: list of str
+        Names of the stages whose outputs are the positional arguments
+    params: dict, optional
+        Keyword arguments of the function, serializable to JSON
+    code: list of callable or module, optional
+        Code called by the function, whose changes invalidate the output
+    fingerprint: str
+        Identity of the external inputs, such as the hash of an input file
+    """
+    def __init__(self, name, function, inputs=(), params=None, code=(), fingerprint=''):
+        self.name = name
+        self.function = function
+        self.inputs = list(inputs)
+        self.params = params or {}
+        self.code = [function] + list(code)
+        self.fingerprint = fingerprint
+
+    def key(self, input_keys):
+        sha = hashlib.sha256()
+        for code in self.code:
+            sha.update(inspect.getsource(code).encode())
+        sha.update(json.dumps(self.params, sort_keys=True, default=str).encode())
+        sha.update(self.fingerprint.encode())
+        for input_key in input_keys:
+            sha.update(input_key.encode())
+        return sha.hexdigest()
+
+
+class Pipeline:
+    """Declarative pipeline of stages memoized on disk.
+
+    The outputs of the stages are pickled in `cache_dir` under their keys, and
+    the least recently used ones are deleted when the cache exceeds
+    `max_cache_size` bytes. Only the stages needed by the requested outputs and
+    missing from the cache are run, and the outputs of the cached stages are
+    loaded only if a stage to run needs them.
+
+    Parameters
+    ----------
+    stages: list of Stage
+        Stages, each declared after its inputs
+    cache_dir: str, optional
+        Folder of the cached outputs, if None the outputs are not cached
+    max_cache_size: int
+        Maximum size of the cache in bytes
+    """
+    def __init__(self, stages, cache_dir=None, max_cache_size=2 ** 30):
+        self.stages = {}
+        self.keys = {}
+        for stage in stages:
+            missing = [name for name in stage.inputs if name not in self.stages]
+            if missing:
+                raise ValueError("The inputs {} of the stage {} are not declared before it".format(
+                    ', '.join(missing), stage.name))
+            self.stages[stage.name] = stage
+            self.keys[stage.name] = stage.key([self.keys[name] for name in stage.inputs])
+        self.cache_dir = cache_dir
+        self.max_cache_size = max_cache_size
+
+    def _cache_file(self, name):
+        return os.path.join(self.cache_dir, '{}-{}.pkl'.format(name, self.keys[name]))
+
+    def _evict(self):
+        files = [os.path.join(self.cache_dir, f) for f in os.listdir(self.cache_dir) if f.endswith('.pkl')]
+        files.sort(key=os.path.getmtime)
+        size = sum(os.path.getsize(f) for f in files)
+        while files and size > self.max_cache_size:
+            oldest = files.pop(0)
+            size -= os.path.getsize(oldest)
+            os.remove(oldest)
+            logging.info('Evicted {} from the pipeline cache'.format(os.path.basename(oldest)))
+
+    def _output(self, name, outputs):
+        if name in outputs:
+            return outputs[name]
+
+        cache_file = None if self.cache_dir is None else self._cache_file(name)
+
+        if cache_file is not None and os.path.exists(cache_file):
+            logging.info('Loading the output of the stage {} from the cache'.format(name))
+            # Touch the file, as the eviction removes the least recently used
+            os.utime(cache_file)
+            output = pd.read_pickle(cache_file)
+        else:
+            stage = self.stages[name]
+            inputs = [self._output(input_name, outputs) for input_name in stage.inputs]
+            logging.info('Running the stage {}'.format(name))
+            output = stage.function(*inputs, **stage.params)
+
+            if cache_file is not None:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                temporary_file = '{}.{}.tmp'.format(cache_file, os.getpid())
+                pd.to_pickle(output, temporary_file)
+                os.replace(temporary_file, cache_file)
+                self._evict()
+
+        outputs[name] = output
+        return output
+
+    def run(self, targets=None, outputs=None):
+        """Outputs of the target stages, by default of all the stages.
+
+        Parameters
+        ----------
+        targets: list of str, optional
+            Names of the stages whose outputs are returned
+        outputs: dict, optional
+            Outputs by stage name already available in memory
+
+        Returns
+        -------
+        dict
+            Outputs by stage name
+        """
+
+        outputs = dict(outputs or {})
+        for name in targets or list(self.stages):
+            self._output(name, outputs)
+        return {name: outputs[name] for name in targets or list(self.stages)}
+
+
+def prepare_split(processed_data, unknown_title='raise', sparse=False, vocabulary=None,
+                  test_size=0.2, random_state=0):
+    """Drop the quarantined passengers, encode and split the data."""
+
+    from titanic import models
+
+    if unknown_title == 'quarantine':
+        processed_data, quarantined_data = data.quarantine_unknown_titles(processed_data)
+        logging.warning('{} passengers with unknown titles were quarantined'.format(len(quarantined_data)))
+
+    if sparse:
+        preparation = models.sparse_data_preparation
+    else:
+        preparation = models.data_preparation
+
+    return preparation(processed_data,
+                       test_size=test_size,
+                       random_state=random_state,
+                       vocabulary=vocabulary)
+
+
+def fit_majority_vote(split):
+    """Fit the majority vote on a split of `prepare_split`."""
+    from titanic import models
+    return models.run_majority_vote(*split)
+
+
+def fit_logistic_regression(split, search='grid'):
+    """Fit the logistic regression on a split of `prepare_split`."""
+    from titanic import models
+    return models.run_logistic_regression(*split, search=search)
+
+
+def compare_registered_models(split, names=None):
+    """Leaderboard and fitted models of the registered models on a split of `prepare_split`."""
+    from titanic import registry
+    return registry.compare_models(*split, names=names)
+
+
+def titanic_pipeline(filename, unknown_title='raise', chunksize=None, sparse=False,
+                     vocabulary=None, search='grid', cache_dir=None, model_names=None,
+                     validate=False, rejects_file=None, max_reject_rate=0.05):
+    """Declarative pipeline of the Titanic analysis.
+
+    The stages are ``processed``, ``split``, ``majority_vote``,
+    ``logistic_regression`` and ``leaderboard``, which compares the models of
+    `titanic.registry` on the same split.
+
+    Parameters
+    ----------
+    filename: str
+        Path to the Titanic CSV, Parquet or Feather input data
+    unknown_title: str
+        Policy for the titles missing from `data.SIMPLIFY_TITLE`
+    chunksize: int, optional
+        Number of rows per chunk to stream the input file
+    sparse: bool
+        Whether to one-hot encode the features into a sparse matrix
+    vocabulary: dict, optional
+        Category vocabulary to encode the dummies with
+    search: str
+        Search method of the ridge parameter
+    cache_dir: str, optional
+        Folder of the cached outputs of the stages
+    model_names: list of str, optional
+        Registered models of the leaderboard, by default all of them
+    validate: bool
+        Whether to validate the rows right after reading, see `validated_chunks`
+    rejects_file: str, optional
+        CSV sidecar file of the rows rejected by the validation
+    max_reject_rate: float
+        Fraction of rejected rows above which the input is refused
+
+    Returns
+    -------
+    Pipeline
+    """
+
+    from titanic import evaluation, models, registry
+
+    # Whole modules are hashed, so that a change of any helper or constant
+    # they define invalidates the outputs of the stages that use them
+    this_module = inspect.getmodule(titanic_pipeline)
+
+    return Pipeline([
+        Stage('processed', read_titanic_data,
+              params={'filename': filename, 'chunksize': chunksize, 'unknown_title': unknown_title,
+                      'validate': validate, 'rejects_file': rejects_file, 'max_reject_rate': max_reject_rate},
+              code=[this_module, config, data, validation],
+              # The keys are only used by the cache, hashing the file would cost a read
+              fingerprint=file_hash(filename) if cache_dir is not None else ''),
+        Stage('split', prepare_split, inputs=['processed'],
+              params={'unknown_title': unknown_title, 'sparse': sparse, 'vocabulary': vocabulary},
+              code=[models, data, config]),
+        Stage('majority_vote', fit_majority_vote, inputs=['split'],
+              code=[models, evaluation]),
+        Stage('logistic_regression', fit_logistic_regression, inputs=['split'],
+              params={'search': search},
+              code=[models, evaluation]),
+        Stage('leaderboard', compare_registered_models, inputs=['split'],
+              params={'names': model_names},
+              code=[registry, models, evaluation]),
+    ], cache_dir=cache_dir)
+
+
+def run_titanic_analysis(filename, unknown_title='raise', chunksize=None, cache_dir=None,
+                         sparse=False, vocabulary_file=None, search='grid', model_names=None,
+                         leaderboard_file=None, validate=True, rejects_file=None, max_reject_rate=0.05):
     """Data pipeline and predictions.
 
     Parameters
     ----------
     filename: str
-        Path to the Titanic CSV input data
+        Path to the Titanic CSV, Parquet or Feather input data
+    unknown_title: str
+        Policy for the titles missing from `data.SIMPLIFY_TITLE`, one of
+        `data.UNKNOWN_TITLE_POLICIES`
+    chunksize: int, optional
+        Number of rows per chunk to stream the input file
+    cache_dir: str, optional
+        Folder of the cache of the outputs of the stages, if None no cache is
+        used, see `titanic_pipeline`
+    sparse: bool
+        Whether to one-hot encode the features into a sparse matrix
+    vocabulary_file: str, optional
+        JSON file of the category vocabulary; it is loaded if it exists and
+        created from the data otherwise
+    search: str
+        Search method of the ridge parameter, one of `models.SEARCH_METHODS`
+    model_names: list of str, optional
+        Models of `titanic.registry` to compare on the same split instead of
+        the majority vote and the logistic regression, ``['all']`` for all
+    leaderboard_file: str, optional
+        JSON file to store the leaderboard of the compared models in
+    validate: bool
+        Whether to validate the rows right after reading, see `validated_chunks`
+    rejects_file: str, optional
+        CSV sidecar file of the rows rejected by the validation
+    max_reject_rate: float
+        Fraction of rejected rows above which the input is refused
     """
 
+    from titanic import models
+
     logging.info('Starting the data analysis pipeline')
 
-    processed_data = (
-        pd.read_csv(filename, usecols=['Name', 'Sex', 'Age', 'Survived'])
-        .pipe(lambda df: df.fillna({'Age': df.Age.median(), }))
-        .pipe(lambda df: df.astype({'Age': 'float64',
-                                    'Name': 'object',
-                                    'Sex': 'category',
-                                    'Survived': 'int64'}))
-        .pipe(data.extract_title)
-    )
+    if model_names is not None and list(model_names) == ['all']:
+        model_names = None
+        compare = True
+    else:
+        compare = model_names is not None
+
+    def pipeline(vocabulary=None):
+        return titanic_pipeline(filename,
+                                unknown_title=unknown_title,
+                                chunksize=chunksize,
+                                sparse=sparse,
+                                vocabulary=vocabulary,
+                                search=search,
+                                cache_dir=cache_dir,
+                                model_names=model_names,
+                                validate=validate,
+                                rejects_file=rejects_file,
+                                max_reject_rate=max_reject_rate)
+
+    vocabulary = None
+    outputs = {}
+    if vocabulary_file is not None:
+        if os.path.exists(vocabulary_file):
+            logging.info('Loading the category vocabulary {}'.format(vocabulary_file))
+            vocabulary = models.load_vocabulary(vocabulary_file)
+        else:
+            # The vocabulary does not change the processed data, which is reused
+            outputs = pipeline().run(['processed'])
+            processed_data = outputs['processed']
+            if unknown_title == 'quarantine':
+                processed_data, _ = data.quarantine_unknown_titles(processed_data)
+            vocabulary = models.category_vocabulary(processed_data)
+            models.save_vocabulary(vocabulary, vocabulary_file)
+            logging.info('Stored the category vocabulary {}'.format(vocabulary_file))
+
+    if not compare:
+        pipeline(vocabulary).run(['majority_vote', 'logistic_regression'], outputs=outputs)
+    else:
+        leaderboard, _ = pipeline(vocabulary).run(['leaderboard'], outputs=outputs)['leaderboard']
+        if leaderboard_file is not None:
+            with open(leaderboard_file, 'w') as f:
+                json.dump(leaderboard, f, indent=2)
+            logging.info('Stored the leaderboard {}'.format(leaderboard_file))
+
+    logging.info('The data analysis pipeline has terminated')
+
+    return
+
+
+def run_titanic_training(filename, artifact_file, unknown_title='raise', chunksize=None,
+                         cache_dir=None, search='grid', out_of_core=False, random_state=0):
+    """Train the logistic regression and save it as a scoring artifact.
+
+    Parameters
+    ----------
+    filename: str
+        Path to the Titanic CSV, Parquet or Feather input data
+    artifact_file: str
+        Path of the JSON artifact, see `scoring.save_artifact`
+    unknown_title: str
+        Policy for the titles missing from `data.SIMPLIFY_TITLE`, one of
+        `data.UNKNOWN_TITLE_POLICIES`
+    chunksize: int, optional
+        Number of rows per chunk to stream the input file
+    cache_dir: str, optional
+        Folder of the cache of the processed data, if None no cache is used
+    search: str
+        Search method of the ridge parameter, one of `models.SEARCH_METHODS`
+    out_of_core: bool
+        Whether to train a mini-batch logistic regression streaming the file
+        in chunks of `chunksize` rows, see `titanic.out_of_core`; the search
+        and the cache are not used
+    random_state: int
+        Seed of the split and of the training
+    """
+
+    from titanic import models
+
+    logging.info('Starting the training pipeline')
+
+    if out_of_core:
+        if chunksize is None:
+            raise ValueError('The out of core training needs a chunksize')
+        from titanic import out_of_core as streaming
+        model, metrics = streaming.train_out_of_core(filename, chunksize, random_state=random_state,
+                                                     unknown_title=unknown_title)
+        coef, intercept = model.coefficients()
+        scoring.save_artifact(
+            artifact_file,
+            coef=coef,
+            intercept=intercept,
+            classes=model.logistic_regression.classes_,
+            features=models.feature_names(model.vocabulary),
+            vocabulary=model.vocabulary,
+            fill_values={'Age': model.age_median},
+            simplify_title=data.SIMPLIFY_TITLE,
+            title_pattern=data.TITLE_PATTERN,
+            dtype='float32',
+            unknown_title=unknown_title,
+            metadata={'alpha': model.alpha,
+                      'search': 'out_of_core',
+                      'metrics': metrics,
+                      'training_file': os.path.basename(filename)},
+        )
+        logging.info('Stored the model artifact {}'.format(artifact_file))
+        logging.info('The training pipeline has terminated')
+        return
+
+    processed_data = load_processed_data(filename,
+                                         unknown_title=unknown_title,
+                                         chunksize=chunksize,
+                                         cache_dir=cache_dir)
+
+    vocabulary = models.category_vocabulary(processed_data)
 
     X_train, X_test, y_train, y_test = models.data_preparation(processed_data,
                                                                test_size=0.2,
-                                                               random_state=0)
+                                                               random_state=random_state,
+                                                               vocabulary=vocabulary)
 
-    models.run_majority_vote(X_train, X_test, y_train, y_test)
-    models.run_logistic_regression(X_train, X_test, y_train, y_test)
+    model = models.run_logistic_regression(X_train, X_test, y_train, y_test, search=search)
+    estimator = getattr(model, 'best_estimator_', model)
 
-    logging.info('The data analysis pipeline has terminated')
+    scoring.save_artifact(
+        artifact_file,
+        coef=estimator.coef_[0],
+        intercept=estimator.intercept_[0],
+        classes=estimator.classes_,
+        features=models.feature_names(vocabulary),
+        vocabulary=vocabulary,
+        # Filling the missing ages with the median leaves the median unchanged
+        fill_values={'Age': processed_data['Age'].median()},
+        simplify_title=data.SIMPLIFY_TITLE,
+        title_pattern=data.TITLE_PATTERN,
+        dtype='float32',
+        unknown_title=unknown_title,
+        metadata={'C': float(np.ravel(estimator.C_)[0]) if hasattr(estimator, 'C_') else estimator.C,
+                  'search': search,
+                  'training_file': os.path.basename(filename)},
+    )
+    logging.info('Stored the model artifact {}'.format(artifact_file))
+
+    logging.info('The training pipeline has terminated')
 
     return
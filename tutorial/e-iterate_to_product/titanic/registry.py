@@ -0,0 +1,190 @@
+"""Registry of the models compared by the Titanic analysis.
+
+A model is registered with a function returning its unfitted estimator and
+the grid of its search space, searched by cross-validation. The registered
+models are trained concurrently on the same split under the CPU budget of
+`titanic.parallel`, and ranked in a leaderboard with their test metrics, fit
+time and predict latency. A new model only needs to be registered:
+
+    registry.register('svm', lambda: SVC(probability=True), {'C': [0.1, 1, 10]})
+"""
+import time
+import logging
+import numpy as np
+from titanic import models, parallel
+
+REGISTRY = {}
+
+
+def register(name, estimator, param_grid=None):
+    """Register a model.
+
+    Parameters
+    ----------
+    name: str
+    estimator: callable
+        Function returning the unfitted scikit-learn classifier, which has to
+        implement `predict_proba`
+    param_grid: dict, optional
+        Lists of the values of the parameters searched by cross-validation,
+        if None the estimator is fitted with its parameters
+    """
+    REGISTRY[name] = {'estimator': estimator, 'param_grid': param_grid or {}}
+
+
+def _logistic_regression():
+    from sklearn.linear_model import LogisticRegression
+    return LogisticRegression(random_state=0, solver='lbfgs')
+
+
+def _random_forest():
+    from sklearn.ensemble import RandomForestClassifier
+    return RandomForestClassifier(n_estimators=100, random_state=0)
+
+
+def _gradient_boosting():
+    from sklearn.ensemble import GradientBoostingClassifier
+    return GradientBoostingClassifier(random_state=0)
+
+
+register('majority_vote', models.MajorityVoteClassifier)
+register('logistic_regression', _logistic_regression, {'C': [2 ** x for x in range(-10, 10)]})
+register('random_forest', _random_forest, {'max_depth': [3, 5, 8, None], 'min_samples_leaf': [1, 5]})
+register('gradient_boosting', _gradient_boosting, {'learning_rate': [0.05, 0.1, 0.2], 'max_depth': [2, 3]})
+
+
+def predict_latency(model, X, n_calls=100):
+    """Median seconds of the prediction of a single passenger."""
+    row = X[:1]
+    latencies = []
+    for _ in range(n_calls):
+        start = time.perf_counter()
+        model.predict(row)
+        latencies.append(time.perf_counter() - start)
+    return float(np.median(latencies))
+
+
+def fit_model(name, X_train, X_test, y_train, y_test, n_jobs=1, cv=10, spec=None):
+    """Fit a registered model, searching its grid, and evaluate it.
+
+    Parameters
+    ----------
+    name: str
+        Name of the registered model
+    X_train: numpy.ndarray or scipy.sparse.csr_matrix
+    X_test: numpy.ndarray or scipy.sparse.csr_matrix
+    y_train: numpy.ndarray
+    y_test: numpy.ndarray
+    n_jobs: int
+        Number of parallel jobs of the search
+    cv: int
+        Number of folds of the search
+    spec: dict, optional
+        Registration of the model, by default that in `REGISTRY`, passed to
+        the worker processes, which do not see the models registered at run
+        time
+
+    Returns
+    -------
+    tuple
+        Fitted model, with the cached evaluation of `models.cache_evaluation`,
+        and its row of the leaderboard
+    """
+
+    from sklearn.model_selection import GridSearchCV
+
+    spec = spec or REGISTRY[name]
+    model = spec['estimator']()
+    if spec['param_grid']:
+        model = GridSearchCV(model, spec['param_grid'], scoring='accuracy', cv=cv, n_jobs=n_jobs)
+
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    models.cache_evaluation(model, X_test, y_test)
+
+    return model, {
+        'model': name,
+        'accuracy': model.evaluation_['accuracy'],
+        'roc_auc': model.evaluation_['roc_auc'],
+        'log_loss': model.evaluation_['log_loss'],
+        'fit_seconds': fit_seconds,
+        'predict_latency_ms': predict_latency(model, X_test) * 1000,
+        'params': getattr(model, 'best_params_', {}),
+    }
+
+
+def split_budget(n_models, budget):
+    """Workers, search jobs per worker and BLAS threads per search job of a CPU budget.
+
+    The product of the three never exceeds the budget, so that the nested
+    searches and their BLAS calls do not oversubscribe the processors.
+    """
+    n_workers = max(1, min(n_models, budget))
+    inner_jobs = max(1, budget // n_workers)
+    blas_threads = max(1, budget // (n_workers * inner_jobs))
+    return n_workers, inner_jobs, blas_threads
+
+
+def compare_models(X_train, X_test, y_train, y_test, names=None, n_jobs=None):
+    """Train registered models concurrently on the same split.
+
+    The CPU budget of `parallel.settings` is shared: the models are fitted by
+    up to `n_jobs` workers, and the searches of each model get the processors
+    left per worker, with the BLAS threads of `split_budget`.
+
+    Parameters
+    ----------
+    X_train: numpy.ndarray or scipy.sparse.csr_matrix
+    X_test: numpy.ndarray or scipy.sparse.csr_matrix
+    y_train: numpy.ndarray
+    y_test: numpy.ndarray
+    names: list of str, optional
+        Names of the registered models, by default all of them
+    n_jobs: int, optional
+        CPU budget, by default that of `parallel.settings`
+
+    Returns
+    -------
+    tuple
+        Leaderboard, a list of the rows of `fit_model` by decreasing
+        accuracy, and fitted models by name
+    """
+
+    from joblib import Parallel, delayed
+
+    names = list(REGISTRY) if names is None else list(names)
+    unknown = [name for name in names if name not in REGISTRY]
+    if unknown:
+        raise ValueError("Unknown models {}, the registered models are {}".format(
+            ', '.join(unknown), ', '.join(REGISTRY)))
+
+    budget = parallel.settings(n_jobs=n_jobs)['n_jobs']
+    n_workers, inner_jobs, blas_threads = split_budget(len(names), budget)
+
+    logging.info('Training {} models with {} workers of {} jobs of {} BLAS threads'.format(
+        len(names), n_workers, inner_jobs, blas_threads))
+
+    with parallel.limits(n_jobs=n_workers, blas_threads=blas_threads):
+        results = Parallel(n_jobs=n_workers)(
+            delayed(fit_model)(name, X_train, X_test, y_train, y_test, n_jobs=inner_jobs, spec=REGISTRY[name])
+            for name in names
+        )
+
+    leaderboard = sorted((row for _, row in results), key=lambda row: -row['accuracy'])
+    fitted = {name: model for name, (model, _) in zip(names, results)}
+
+    logging.info('Leaderboard\n{}'.format(format_leaderboard(leaderboard)))
+
+    return leaderboard, fitted
+
+
+def format_leaderboard(leaderboard):
+    """Text table of a leaderboard."""
+    lines = ['{:<24}{:>10}{:>10}{:>10}{:>12}{:>14}'.format(
+        'model', 'accuracy', 'roc_auc', 'log_loss', 'fit_s', 'latency_ms')]
+    for row in leaderboard:
+        lines.append('{model:<24}{accuracy:>10.3f}{roc_auc:>10.3f}{log_loss:>10.3f}'
+                     '{fit_seconds:>12.2f}{predict_latency_ms:>14.3f}'.format(**row))
+    return '\n'.join(lines)
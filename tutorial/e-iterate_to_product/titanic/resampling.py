@@ -0,0 +1,256 @@
+"""Repeated evaluation of the models over random splits or bootstrap resamples.
+
+A single train and test split gives a noisy accuracy. Here the models are
+fitted and evaluated on many resamples of the same data over a pool of
+processes, and the metrics are summarized by their mean and a confidence
+interval. The design matrix and the classes are copied once into shared
+memory, which the workers map without copying, so that the tasks only carry
+the name of the model and the seed of the resample.
+
+Each worker limits its BLAS to one thread, so that the pool does not
+oversubscribe the processors and the throughput grows with the processes.
+"""
+import time
+import logging
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+from titanic import evaluation, models, parallel
+from titanic.config import RESAMPLING_METHODS
+
+METRICS = ('accuracy', 'roc_auc', 'log_loss')
+
+
+def resample_indices(n_samples, method='split', test_size=0.2, random_state=0):
+    """Train and test rows of a resample.
+
+    Parameters
+    ----------
+    n_samples: int
+    method: str
+        ``'split'`` for a random train and test split, or ``'bootstrap'`` for
+        a training sample drawn with replacement and tested on the rows left
+        out of it
+    test_size: float
+        Fraction of the test rows of the splits
+    random_state: int
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        train_index, test_index
+    """
+
+    if method == 'split':
+        return models.split_indices(n_samples, test_size, random_state=random_state)
+    if method == 'bootstrap':
+        train_index = np.random.RandomState(random_state).randint(n_samples, size=n_samples)
+        out_of_bag = np.ones(n_samples, dtype=bool)
+        out_of_bag[train_index] = False
+        return train_index, np.flatnonzero(out_of_bag)
+    raise ValueError("The resampling method has to be one of {}".format(', '.join(RESAMPLING_METHODS)))
+
+
+def confidence_interval(scores, confidence=0.95):
+    """Percentile interval of the scores of the resamples."""
+    tail = (1 - confidence) / 2 * 100
+    lower, upper = np.nanpercentile(scores, [tail, 100 - tail])
+    return float(lower), float(upper)
+
+
+def summarize(scores, confidence=0.95):
+    """Mean, standard deviation and confidence interval of each metric by model.
+
+    Parameters
+    ----------
+    scores: dict
+        Lists of the reports of `evaluation.evaluate` by model
+    confidence: float
+
+    Returns
+    -------
+    dict
+    """
+
+    summary = {}
+    for name, reports in scores.items():
+        summary[name] = {}
+        for metric in METRICS:
+            values = np.array([report[metric] for report in reports])
+            summary[name][metric] = {
+                'mean': float(np.nanmean(values)),
+                'std': float(np.nanstd(values)),
+                'confidence_interval': confidence_interval(values, confidence),
+            }
+    return summary
+
+
+# Data and estimators of a worker process of `repeated_evaluation`
+_worker = {}
+
+
+def _attach_worker(shared, estimators, method, test_size):
+    from threadpoolctl import threadpool_limits
+
+    _worker['memory'] = [shared_memory.SharedMemory(name=name) for name, _, _ in shared]
+    _worker['X'], _worker['y'] = [
+        np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+        for memory, (_, shape, dtype) in zip(_worker['memory'], shared)
+    ]
+    _worker.update(estimators=estimators, method=method, test_size=test_size)
+    # Kept for the life of the worker
+    _worker['limits'] = threadpool_limits(limits=1, user_api='blas')
+
+
+def _evaluate_task(task):
+    from sklearn.base import clone
+
+    name, random_state = task
+    X, y = _worker['X'], _worker['y']
+    train_index, test_index = resample_indices(len(y), _worker['method'], _worker['test_size'], random_state)
+
+    estimator = clone(_worker['estimators'][name]).fit(X[train_index], y[train_index])
+    report, _ = evaluation.evaluate(estimator, X[test_index], y[test_index])
+
+    return name, random_state, report
+
+
+def _share(array):
+    memory = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf)[...] = array
+    return memory, (memory.name, array.shape, array.dtype.str)
+
+
+def repeated_evaluation(X, y, estimators, n_repeats=100, method='split', test_size=0.2,
+                        random_state=0, processes=None, confidence=0.95):
+    """Fit and evaluate estimators on many resamples over a pool of processes.
+
+    The results do not depend on the number of processes: the resample `i`
+    has the seed ``random_state + i`` for all the estimators.
+
+    Parameters
+    ----------
+    X: numpy.ndarray
+        Dense design matrix
+    y: numpy.ndarray
+    estimators: dict
+        Unfitted scikit-learn classifiers by name
+    n_repeats: int
+        Number of resamples
+    method: str
+        One of `RESAMPLING_METHODS`, see `resample_indices`
+    test_size: float
+        Fraction of the test rows of the splits
+    random_state: int
+    processes: int, optional
+        Number of worker processes, by default the available processors
+    confidence: float
+        Level of the confidence intervals
+
+    Returns
+    -------
+    tuple
+        Summary of `summarize` and lists of the reports by estimator, in the
+        order of the resamples
+    """
+
+    if method not in RESAMPLING_METHODS:
+        raise ValueError("The resampling method has to be one of {}".format(', '.join(RESAMPLING_METHODS)))
+
+    processes = processes or parallel.available_cpus()
+    tasks = [(name, random_state + i) for name in estimators for i in range(n_repeats)]
+
+    start = time.perf_counter()
+    memories = []
+    try:
+        shared = []
+        for array in (np.ascontiguousarray(X), np.ascontiguousarray(y)):
+            memory, description = _share(array)
+            memories.append(memory)
+            shared.append(description)
+
+        with multiprocessing.Pool(processes, initializer=_attach_worker,
+                                  initargs=(shared, estimators, method, test_size)) as pool:
+            results = pool.map(_evaluate_task, tasks, chunksize=max(1, len(tasks) // (4 * processes)))
+    finally:
+        for memory in memories:
+            memory.close()
+            memory.unlink()
+
+    scores = {name: [report for result_name, _, report in sorted(results, key=lambda result: result[1])
+                     if result_name == name]
+              for name in estimators}
+    summary = summarize(scores, confidence)
+
+    logging.info('Evaluated {} models on {} {} resamples with {} processes in {:.1f} s'.format(
+        len(estimators), n_repeats, method, processes, time.perf_counter() - start))
+    for name, metrics in summary.items():
+        accuracy = metrics['accuracy']
+        logging.info('The accuracy of the {} is {:.1f}% ({:.0f}% interval {:.1f}% to {:.1f}%)'.format(
+            name, accuracy['mean'] * 100, confidence * 100,
+            accuracy['confidence_interval'][0] * 100, accuracy['confidence_interval'][1] * 100))
+
+    return summary, scores
+
+
+def run_repeated_evaluation(filename, n_repeats=100, method='split', processes=None, unknown_title='raise',
+                            chunksize=None, cache_dir=None, random_state=0, C=1.0, output=None):
+    """Repeated evaluation of the majority vote and of the logistic regression.
+
+    The logistic regression has the fixed ridge parameter `C`, as searching
+    it on every resample would multiply the fits by those of the search.
+
+    Parameters
+    ----------
+    filename: str
+        Path to the Titanic CSV, Parquet or Feather input data
+    n_repeats: int
+        Number of resamples
+    method: str
+        One of `RESAMPLING_METHODS`
+    processes: int, optional
+        Number of worker processes, by default the available processors
+    unknown_title: str
+        Policy for the titles missing from `data.SIMPLIFY_TITLE`
+    chunksize: int, optional
+        Number of rows per chunk to stream the input file
+    cache_dir: str, optional
+        Folder of the cache of the processed data, if None no cache is used
+    random_state: int
+        Seed of the first resample
+    C: float
+        Inverse of the ridge penalty of the logistic regression
+    output: str, optional
+        JSON file to store the summary in
+
+    Returns
+    -------
+    dict
+        Summary of `summarize`
+    """
+
+    import json
+    from sklearn.linear_model import LogisticRegression
+    from titanic import pipelines
+
+    processed_data = pipelines.load_processed_data(filename,
+                                                   unknown_title=unknown_title,
+                                                   chunksize=chunksize,
+                                                   cache_dir=cache_dir)
+    X, _ = models.design_matrix(processed_data, vocabulary=models.category_vocabulary(processed_data))
+    y = processed_data['Survived'].values
+
+    estimators = {
+        'majority vote classifier': models.MajorityVoteClassifier(),
+        'ridge logistic regression classifier': LogisticRegression(C=C, solver='lbfgs', random_state=0),
+    }
+
+    summary, _ = repeated_evaluation(X, y, estimators, n_repeats=n_repeats, method=method,
+                                     random_state=random_state, processes=processes)
+
+    if output is not None:
+        with open(output, 'w') as f:
+            json.dump({'method': method, 'n_repeats': n_repeats, 'models': summary}, f, indent=2)
+        logging.info('Stored the summary of the repeated evaluation {}'.format(output))
+
+    return summary
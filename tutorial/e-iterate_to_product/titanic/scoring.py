@@ -0,0 +1,402 @@
+"""Batch scoring with a trained model artifact.
+
+The artifact is a JSON file with the coefficients of the logistic regression
+and everything needed to encode raw passengers as in training: the feature
+names, the category vocabulary, the fill values, the title mapping and the
+policy for the unknown titles. The
+same artifact, exported in memory by `models.export_scorer`, scores records
+with a single matrix product. This module depends only on numpy and the
+standard library, so that the scoring jobs start without loading pandas or
+scikit-learn.
+"""
+import os
+import re
+import csv
+import glob
+import json
+import time
+import shutil
+import logging
+import datetime
+import tempfile
+import multiprocessing
+import numpy as np
+from titanic import parallel
+from titanic.config import NA_VALUES
+
+ARTIFACT_VERSION = 1
+
+
+def make_artifact(coef, intercept, classes, features, vocabulary, fill_values,
+                  simplify_title, title_pattern, metadata=None, dtype='float64',
+                  unknown_title='raise'):
+    """Model artifact of a trained logistic regression and its encoding.
+
+    Parameters
+    ----------
+    coef: numpy.ndarray
+        Coefficients of the features, of shape (n_features,)
+    intercept: float
+    classes: list of int
+        Classes of the negative and positive decision
+    features: list of str
+        Names of the columns of the design matrix
+    vocabulary: dict
+        Lists of categories by categorical column
+    fill_values: dict
+        Values of the missing numerical features by column
+    simplify_title: dict
+        Mapping of the raw titles onto the simplified titles
+    title_pattern: re.Pattern
+        Regular expression capturing the raw title from the name
+    metadata: dict, optional
+        Additional information, such as the parameters of the model
+    dtype: str
+        Type of the design matrix in training, the numerical features are
+        rounded to it when encoding, so that the decisions are the same
+    unknown_title: str
+        Policy for the unknown titles in training, with ``'other'`` they are
+        encoded as the title ``'Other'``
+
+    Returns
+    -------
+    dict
+        Artifact serializable to JSON
+    """
+
+    return {
+        'version': ARTIFACT_VERSION,
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'coef': [float(value) for value in coef],
+        'intercept': float(intercept),
+        'classes': [int(value) for value in classes],
+        'features': list(features),
+        'vocabulary': vocabulary,
+        'fill_values': {column: float(value) for column, value in fill_values.items()},
+        'simplify_title': simplify_title,
+        'title_pattern': title_pattern.pattern,
+        'unknown_title': unknown_title,
+        'dtype': dtype,
+        'metadata': metadata or {},
+    }
+
+
+def save_artifact(filename, *args, **kwargs):
+    """Save a trained logistic regression and its encoding to a JSON file.
+
+    Parameters
+    ----------
+    filename: str
+        Path of the artifact
+    args, kwargs
+        Arguments of `make_artifact`
+    """
+
+    with open(filename, 'w') as f:
+        json.dump(make_artifact(*args, **kwargs), f, indent=2)
+
+
+def compile_artifact(artifact):
+    """Prepare an artifact of `make_artifact` for scoring.
+
+    The coefficients become a column vector, the title pattern is compiled
+    and the column of each feature is indexed, once and for all the scorings.
+
+    Parameters
+    ----------
+    artifact: dict
+
+    Returns
+    -------
+    dict
+    """
+
+    if artifact.get('version') != ARTIFACT_VERSION:
+        raise ValueError("The artifact version {} is not supported, expected {}".format(
+            artifact.get('version'), ARTIFACT_VERSION))
+
+    artifact = dict(artifact)
+    # Column vector, as the transposed coefficients of scikit-learn
+    artifact['coef'] = np.array(artifact['coef'], dtype=np.float64)[:, np.newaxis]
+    artifact['title_pattern'] = re.compile(artifact['title_pattern'])
+    artifact['column_index'] = {feature: i for i, feature in enumerate(artifact['features'])}
+    # The artifacts of earlier versions of the package have no type
+    artifact['dtype'] = np.dtype(artifact.get('dtype', 'float64'))
+    artifact.setdefault('unknown_title', 'raise')
+
+    return artifact
+
+
+def load_artifact(filename):
+    """Load a model artifact saved with `save_artifact`.
+
+    Parameters
+    ----------
+    filename: str
+        Path of the artifact
+
+    Returns
+    -------
+    dict
+    """
+
+    with open(filename) as f:
+        return compile_artifact(json.load(f))
+
+
+def extract_titles(names, artifact):
+    """Simplified titles of the names.
+
+    The unknown titles are ``'Other'`` if the model was trained with the
+    policy ``'other'``, as in `data.extract_title`, and None otherwise. The
+    names are parsed once each, even when they repeat.
+    """
+
+    pattern = artifact['title_pattern']
+    simplify_title = artifact['simplify_title']
+    unknown = 'Other' if artifact['unknown_title'] == 'other' else None
+
+    titles = {}
+    for name in set(names):
+        match = pattern.match(name) if isinstance(name, str) else None
+        title = simplify_title.get(match.group(1).strip()) if match else None
+        titles[name] = unknown if title is None else title
+
+    return [titles[name] for name in names]
+
+
+def to_float(value):
+    """Float of a CSV or JSON value, NaN for the missing values and the markers of `NA_VALUES`."""
+    if value is None or (isinstance(value, str) and value in NA_VALUES):
+        return float('nan')
+    return float(value)
+
+
+def encode(records, artifact):
+    """Encode raw passenger records into the design matrix of the artifact.
+
+    The categories that are not in the vocabulary of the artifact have no
+    dummy set, as in training, and the unknown titles are encoded according
+    to the policy of the artifact, see `extract_titles`.
+
+    Parameters
+    ----------
+    records: list of dict
+        Passengers with the keys `Name`, `Sex` and `Age`
+    artifact: dict
+
+    Returns
+    -------
+    numpy.ndarray
+        Design matrix of shape (len(records), len(artifact['features'])) and
+        of the type of the training design matrix
+    """
+
+    column_index = artifact['column_index']
+
+    X = np.zeros((len(records), len(column_index)), dtype=artifact['dtype'])
+
+    for column, fill_value in artifact['fill_values'].items():
+        values = np.array([to_float(record.get(column)) for record in records])
+        X[:, column_index[column]] = np.where(np.isnan(values), fill_value, values)
+
+    categorical = {column: [record.get(column) for record in records]
+                   for column in artifact['vocabulary'] if column != 'Title'}
+    if 'Title' in artifact['vocabulary']:
+        categorical['Title'] = extract_titles([record.get('Name') for record in records], artifact)
+
+    for column, values in categorical.items():
+        columns = np.array([column_index.get('{}_{}'.format(column, value), -1)
+                            for value in values], dtype=np.intp)
+        known = columns >= 0
+        X[np.flatnonzero(known), columns[known]] = 1
+
+    return X
+
+
+def decision_function(X, artifact):
+    """Decision of the logistic regression, as in `LogisticRegression.decision_function`.
+
+    The matrix product has the operands of scikit-learn, so that the
+    decisions are the same to the bit.
+    """
+    return (X @ artifact['coef'] + artifact['intercept']).ravel()
+
+
+def predict_proba(X, artifact):
+    """Probabilities of the positive class."""
+    return 1 / (1 + np.exp(-decision_function(X, artifact)))
+
+
+def predict(X, artifact):
+    """Predicted classes, as in `LogisticRegression.predict`."""
+    negative, positive = artifact['classes']
+    return np.where(decision_function(X, artifact) > 0, positive, negative)
+
+
+def predict_with_proba(X, artifact):
+    """Predicted classes and probabilities of the positive class from a single matrix product."""
+    negative, positive = artifact['classes']
+    decision = decision_function(X, artifact)
+    return np.where(decision > 0, positive, negative), 1 / (1 + np.exp(-decision))
+
+
+def score_records(records, artifact):
+    """Predicted classes and probabilities of the positive class of raw passenger records."""
+    return predict_with_proba(encode(records, artifact), artifact)
+
+
+def _batches(reader, batch_size):
+    batch = []
+    for record in reader:
+        batch.append(record)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def score_file(filename, artifact, output, batch_size=100000, source=False):
+    """Score the passengers of a CSV file in batches.
+
+    Only one batch of records is held in memory at a time.
+
+    Parameters
+    ----------
+    filename: str
+        Path to the CSV file of the passengers
+    artifact: dict
+        Model artifact returned by `load_artifact`
+    output: str
+        Path to the CSV file of the predictions
+    batch_size: int
+        Number of passengers scored at once
+    source: bool
+        Whether to add the column `File` with the name of the input file
+
+    Returns
+    -------
+    int
+        Number of scored passengers
+    """
+
+    n_scored = 0
+
+    with open(filename, newline='') as input_file, open(output, 'w', newline='') as output_file:
+        reader = csv.DictReader(input_file)
+        id_column = 'PassengerId' if 'PassengerId' in reader.fieldnames else None
+
+        writer = csv.writer(output_file)
+        writer.writerow((['File'] if source else [])
+                        + ([id_column] if id_column else [])
+                        + ['Survived', 'Probability'])
+
+        for batch in _batches(reader, batch_size):
+            rows = zip(*score_records(batch, artifact))
+            if id_column:
+                rows = ((record[id_column], ) + row for record, row in zip(batch, rows))
+            if source:
+                rows = ((os.path.basename(filename), ) + row for row in rows)
+            writer.writerows(rows)
+
+            n_scored += len(batch)
+            logging.info('Scored {} passengers'.format(n_scored))
+
+    return n_scored
+
+
+def input_files(pattern):
+    """CSV files of a directory, of a glob pattern or the file itself."""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*.csv')
+    return sorted(glob.glob(pattern))
+
+
+# Artifact of a worker process of `score_files`, loaded once per process
+_worker_artifact = None
+
+
+def _load_worker_artifact(artifact_file):
+    global _worker_artifact
+    _worker_artifact = load_artifact(artifact_file)
+
+
+def _has_id_column(filename):
+    with open(filename, newline='') as f:
+        return 'PassengerId' in next(csv.reader(f), [])
+
+
+def _score_part(task):
+    filename, part, batch_size = task
+    # Only the messages of the main process are logged
+    logging.disable(logging.INFO)
+    n_scored = score_file(filename, _worker_artifact, part, batch_size=batch_size, source=True)
+    return filename, part, n_scored
+
+
+def score_files(filenames, artifact_file, output, processes=None, batch_size=100000):
+    """Score many CSV files over a pool of processes into a single output.
+
+    Each worker process loads the artifact once and scores whole files in
+    batches into its own part file, which bounds its memory to one batch. The
+    parts are appended to `output` as they complete, with the column `File`
+    naming the input file of each prediction. The headers of all the files
+    are read before scoring, and a `ValueError` is raised if only some of
+    them have the column `PassengerId`, as the parts would not align.
+
+    Parameters
+    ----------
+    filenames: list of str
+        Paths to the CSV files of the passengers
+    artifact_file: str
+        Path of the JSON model artifact
+    output: str
+        Path to the combined CSV file of the predictions
+    processes: int, optional
+        Number of worker processes, by default the available processors of
+        `parallel.available_cpus`
+    batch_size: int
+        Number of passengers scored at once by each worker
+
+    Returns
+    -------
+    int
+        Number of scored passengers
+    """
+
+    without_id = [filename for filename in filenames if not _has_id_column(filename)]
+    if without_id and len(without_id) < len(filenames):
+        raise ValueError("The files {} have no column PassengerId, unlike the others".format(
+            ', '.join(without_id)))
+
+    start = time.perf_counter()
+    n_scored = 0
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output))) as folder, \
+            multiprocessing.Pool(processes or parallel.available_cpus(), initializer=_load_worker_artifact,
+                                 initargs=(artifact_file, )) as pool, \
+            open(output, 'w', newline='') as output_file:
+
+        tasks = [(filename, os.path.join(folder, 'part_{}.csv'.format(i)), batch_size)
+                 for i, filename in enumerate(filenames)]
+
+        header_written = False
+        for i, (filename, part, n_part) in enumerate(pool.imap_unordered(_score_part, tasks), 1):
+            with open(part, newline='') as part_file:
+                header = part_file.readline()
+                if not header_written:
+                    output_file.write(header)
+                    header_written = True
+                shutil.copyfileobj(part_file, output_file)
+            os.remove(part)
+
+            n_scored += n_part
+            elapsed = time.perf_counter() - start
+            logging.info('Scored {} of {} files, {} passengers, {:,.0f} passengers/sec'.format(
+                i, len(tasks), n_scored, n_scored / elapsed))
+
+    logging.info('Scored {} passengers of {} files in {:.1f} s'.format(
+        n_scored, len(filenames), time.perf_counter() - start))
+
+    return n_scored
@@ -0,0 +1,168 @@
+"""Online survival predictions for single passengers over HTTP.
+
+The server loads a model artifact of `titanic.scoring` once, and answers
+
+    POST /predict    {"Name": "Braund, Mr. Owen Harris", "Sex": "male", "Age": 22}
+
+with ``{"Survived": 0, "Probability": 0.12}``. The requests that arrive
+while a batch is being scored are queued and scored together in the next
+batch, with a single vectorized encoding and matrix product. Like
+`titanic.scoring`, this module depends only on numpy and the standard library.
+"""
+import json
+import asyncio
+import logging
+from titanic import scoring
+
+RESPONSE_HEADERS = 'HTTP/1.1 {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\n\r\n'
+
+STATUS = {200: '200 OK', 400: '400 Bad Request', 404: '404 Not Found', 405: '405 Method Not Allowed',
+          500: '500 Internal Server Error'}
+
+
+class PredictionServer:
+    """HTTP server micro-batching the predictions of the concurrent requests.
+
+    Parameters
+    ----------
+    artifact: dict
+        Model artifact returned by `scoring.load_artifact`
+    max_batch_size: int
+        Maximum number of passengers scored at once
+    """
+    def __init__(self, artifact, max_batch_size=256):
+        self.artifact = artifact
+        self.max_batch_size = max_batch_size
+        self.queue = None
+
+    async def predict(self, record):
+        """Predict the survival of one passenger within the next batch."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((record, future))
+        return await future
+
+    def score_batch(self, records):
+        """Predictions of a batch of passengers as JSON-serializable dicts."""
+        predictions, probabilities = scoring.score_records(records, self.artifact)
+        return [{'Survived': int(survived), 'Probability': float(probability)}
+                for survived, probability in zip(predictions, probabilities)]
+
+    async def _batcher(self):
+        while True:
+            batch = [await self.queue.get()]
+            # Take, without waiting, the requests queued in the meanwhile
+            while len(batch) < self.max_batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            records, futures = zip(*batch)
+            try:
+                results = self.score_batch(records)
+            except Exception as error:
+                for future in futures:
+                    future.set_exception(error)
+            else:
+                for future, result in zip(futures, results):
+                    future.set_result(result)
+
+    async def _respond(self, method, path, body):
+        if path == '/health':
+            return 200, {'status': 'ok'}
+        if path != '/predict':
+            return 404, {'error': 'Unknown path {}'.format(path)}
+        if method != 'POST':
+            return 405, {'error': 'Use POST to predict'}
+
+        try:
+            record = json.loads(body)
+        except ValueError:
+            return 400, {'error': 'The body is not valid JSON'}
+        if not isinstance(record, dict):
+            return 400, {'error': 'The body has to be a JSON object'}
+
+        # Invalid values are rejected here, so that they never fail a whole batch
+        for column in self.artifact['fill_values']:
+            try:
+                scoring.to_float(record.get(column))
+            except (TypeError, ValueError):
+                return 400, {'error': 'The value of {} is not a number'.format(column)}
+        text_columns = [column for column in self.artifact['vocabulary'] if column != 'Title']
+        if 'Title' in self.artifact['vocabulary']:
+            text_columns.append('Name')
+        for column in text_columns:
+            if not isinstance(record.get(column), (str, type(None))):
+                return 400, {'error': 'The value of {} is not a string'.format(column)}
+
+        return 200, await self.predict(record)
+
+    async def handle(self, reader, writer):
+        """Answer the requests of a keep-alive connection."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                try:
+                    status, response = await self._respond(method, path, body)
+                except Exception:
+                    logging.exception('Failed to answer {} {}'.format(method, path))
+                    status, response = 500, {'error': 'The prediction failed'}
+
+                payload = json.dumps(response).encode()
+                writer.write(RESPONSE_HEADERS.format(STATUS[status], len(payload)).encode() + payload)
+                await writer.drain()
+
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host='127.0.0.1', port=8000):
+        """Start the batcher and listen for connections.
+
+        Returns
+        -------
+        asyncio.AbstractServer
+        """
+        self.queue = asyncio.Queue()
+        self._batcher_task = asyncio.create_task(self._batcher())
+        return await asyncio.start_server(self.handle, host, port)
+
+
+def run_server(artifact_file, host='127.0.0.1', port=8000, max_batch_size=256):
+    """Serve the predictions of a model artifact until interrupted.
+
+    Parameters
+    ----------
+    artifact_file: str
+        Path of the JSON artifact created by `titanic_train`
+    host: str
+    port: int
+    max_batch_size: int
+        Maximum number of passengers scored at once
+    """
+
+    artifact = scoring.load_artifact(artifact_file)
+
+    async def serve():
+        server = await PredictionServer(artifact, max_batch_size=max_batch_size).start(host, port)
+        logging.info('Serving the predictions on http://{}:{}/predict'.format(host, port))
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        logging.info('The prediction server has stopped')
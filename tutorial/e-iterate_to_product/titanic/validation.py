@@ -0,0 +1,156 @@
+"""Schema and data-quality validation of the raw passenger data.
+
+The rows are checked with vectorized column operations against the rules
+
+- ``Name``: present and of the form ``Surname, Title. Given names``;
+- ``Sex``: ``male`` or ``female``;
+- ``Age``: missing, or a number between 0 and `MAX_AGE`;
+- ``Survived``: 0 or 1.
+
+The rows breaking a rule are rejected with the names of the broken rules,
+and the valid rows are passed on with numerical `Age` and `Survived`. The
+whole input is refused when the rejected rows or the missing ages exceed a
+tolerated rate, so that a bad file fails at ingest rather than in training.
+The titles that are well-formed but unknown are left to the unknown title
+policy of `data.extract_title`.
+"""
+import re
+import logging
+import numpy as np
+import pandas as pd
+
+REQUIRED_COLUMNS = ['Name', 'Sex', 'Age', 'Survived']
+
+NAME_PATTERN = re.compile(r'^[^,]+,[^,.]+\.')
+
+SEXES = ['male', 'female']
+
+MAX_AGE = 120
+
+# Tolerated rates of missing values of the nullable columns
+MAX_NULL_RATES = {'Age': 0.5}
+
+# Rows validated before the rates are checked on a partial input, so that a
+# few rejects in a small first chunk do not refuse a good file
+MIN_CHECKED_ROWS = 100
+
+
+def check_columns(columns):
+    """Raise a `ValueError` if required columns are missing."""
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise ValueError("The input data has no column {}".format(', '.join(missing)))
+
+
+def validate(df):
+    """Validate the rows of raw passenger data.
+
+    Parameters
+    ----------
+    df: pandas.DataFrame
+        Raw data with the columns `REQUIRED_COLUMNS`, of any type, such as
+        text or categories
+
+    Returns
+    -------
+    tuple
+        Valid rows, with numerical `Age` and `Survived`, rejected rows, with
+        their original values and the column `Rejected` listing the broken
+        rules, and summary of `summarize`
+    """
+
+    check_columns(df.columns)
+
+    age = pd.to_numeric(df['Age'], errors='coerce')
+    survived = pd.to_numeric(df['Survived'], errors='coerce')
+    names = df['Name'].astype('object')
+
+    broken = {
+        'name_missing': names.isna().values,
+        'name_format': (names.notna() & ~names.str.match(NAME_PATTERN).fillna(False).astype(bool)).values,
+        'sex_invalid': ~df['Sex'].isin(SEXES).values,
+        'age_not_numeric': (age.isna() & df['Age'].notna()).values,
+        'age_out_of_range': ((age < 0) | (age > MAX_AGE)).values,
+        'survived_invalid': ~survived.isin([0, 1]).values,
+    }
+
+    rejected = np.zeros(len(df), dtype=bool)
+    for mask in broken.values():
+        rejected |= mask
+
+    valid = df[~rejected].assign(Age=age[~rejected], Survived=survived[~rejected])
+    # The categories of the rejected values would become dummies
+    for column in valid.columns:
+        if valid[column].dtype.name == 'category':
+            valid[column] = valid[column].cat.remove_unused_categories()
+
+    rejects = df[rejected].copy()
+    reasons = pd.Series('', index=rejects.index, dtype='object')
+    for rule, mask in broken.items():
+        reasons[mask[rejected]] += rule + ';'
+    rejects['Rejected'] = reasons.str.rstrip(';')
+
+    summary = summarize(len(df), broken, rejected, {'Age': int(df['Age'].isna().sum())})
+
+    return valid, rejects, summary
+
+
+def summarize(n_rows, broken, rejected, n_missing):
+    """Counts of the rows, of the rejected rows, of each broken rule and of the missing values."""
+    return {
+        'rows': n_rows,
+        'rejected': int(np.count_nonzero(rejected)),
+        'rules': {rule: int(np.count_nonzero(mask)) for rule, mask in broken.items()},
+        'missing': n_missing,
+    }
+
+
+def merge_summaries(summary, other):
+    """Summary of the concatenation of two validated inputs."""
+    return {
+        'rows': summary['rows'] + other['rows'],
+        'rejected': summary['rejected'] + other['rejected'],
+        'rules': {rule: summary['rules'].get(rule, 0) + count for rule, count in other['rules'].items()},
+        'missing': {column: summary['missing'].get(column, 0) + count
+                    for column, count in other['missing'].items()},
+    }
+
+
+def check_quality(summary, max_reject_rate=0.05):
+    """Raise a `ValueError` if the rejected rows or the missing values exceed their tolerated rates.
+
+    Parameters
+    ----------
+    summary: dict
+        Summary of `validate`
+    max_reject_rate: float
+        Tolerated fraction of rejected rows
+    """
+
+    n_rows = max(summary['rows'], 1)
+    reject_rate = summary['rejected'] / n_rows
+    if reject_rate > max_reject_rate:
+        raise ValueError("{:.1%} of the rows are rejected, more than {:.1%}: {}".format(
+            reject_rate, max_reject_rate,
+            ', '.join('{} {}'.format(rule, count) for rule, count in summary['rules'].items() if count)))
+
+    for column, n_missing in summary['missing'].items():
+        null_rate = n_missing / n_rows
+        if null_rate > MAX_NULL_RATES[column]:
+            raise ValueError("{:.1%} of the values of {} are missing, more than {:.1%}".format(
+                null_rate, column, MAX_NULL_RATES[column]))
+
+
+def log_summary(summary):
+    """Log the counts of a summary, with a warning per broken rule."""
+    logging.info('Validated {} rows: {} rejected, {}'.format(
+        summary['rows'], summary['rejected'],
+        ', '.join('{} missing {}'.format(count, column) for column, count in summary['missing'].items())))
+    for rule, count in summary['rules'].items():
+        if count:
+            logging.warning('{} rows rejected by the rule {}'.format(count, rule))
+
+
+def write_rejects(rejects, filename, append=False):
+    """Write the rejected rows to a CSV sidecar file."""
+    rejects.to_csv(filename, mode='a' if append else 'w', header=not append, index=False)